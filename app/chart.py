@@ -0,0 +1,48 @@
+"""Static settings of the price chart built in app/main.py.
+
+main.py is re-executed on every Streamlit rerun; these dicts are built once
+per process here and only read by the chart code.
+"""
+
+# ruff: noqa: E501
+
+# Longest series drawn as-is; longer ones are downsampled before plotting
+MAX_PLOT_POINTS = 4000
+
+# Subplot panels, top to bottom: name -> (relative height, y-axis title).
+# Hidden panels get no row; make_subplots normalizes the remaining heights.
+PANELS = {
+    "price": (0.6, "Price (EUR)"),
+    "volume": (0.2, "Volume"),
+    "returns": (0.2, "Cumulative Return (%)"),
+}
+
+# Hover template of each chart trace, by trace name
+HOVER = {
+    "OHLC": "Date: %{x}<br>open: %{open:.2f}<br>high: %{high:.2f}<br>low: %{low:.2f}<br>close: %{close:.2f}<extra></extra>",
+    "Volume": "Date: %{x}<br>Volume: %{y:,}<extra></extra>",
+    "Cumulative Return %": "Date: %{x}<br>%{y:.2f}%<extra></extra>",
+    **{
+        name: "Date: %{x}<br>" + name + ": %{y:.2f}<extra></extra>"
+        for name in ("SMA20", "SMA50", "BBU", "BBL")
+    },
+}
+
+# Period buttons of the bottom x-axis
+RANGESELECTOR = dict(
+    buttons=[
+        dict(count=1, label="1d", step="day", stepmode="backward"),
+        dict(count=7, label="7d", step="day", stepmode="backward"),
+        dict(count=1, label="1m", step="month", stepmode="backward"),
+        dict(count=6, label="6m", step="month", stepmode="backward"),
+        dict(step="all", label="All"),
+    ]
+)
+
+# Grid and tick styling shared by every x and y axis
+AXIS_STYLE = dict(
+    showgrid=True,
+    gridcolor="rgba(0,0,0,0.06)",
+    zerolinecolor="rgba(0,0,0,0.04)",
+    tickfont=dict(color="rgba(0,0,0,0.88)"),
+)
@@ -0,0 +1,74 @@
+"""Companies offered in the selector and their UI theme (color, accent, logo).
+
+Kept out of app/main.py, which Streamlit re-executes on every rerun, so the
+tables and the derived theme are built once per process.
+"""
+
+# ruff: noqa: E501
+from urllib.parse import quote
+
+COMPANIES = (
+    ("Hermès", "RMS.PA"),
+    ("TotalEnergies", "TTE.PA"),
+    ("Airbus", "AIR.PA"),
+    ("Sopra Steria", "SOP.PA"),
+    ("Dassault Systèmes", "DSY.PA"),
+)
+COMPANY_NAMES = tuple(name for name, _ in COMPANIES)
+NAME_TO_SYMBOL = dict(COMPANIES)
+
+# Per-company metadata: preferred color (hex) and optional logo URL.
+# We use a fallback avatar generator if no real logo URL is provided.
+COMPANY_META = {
+    "Hermès": {"color": "#D4AF37", "logo_url": "https://logo.clearbit.com/hermes.com"},
+    "TotalEnergies": {
+        "color": "#ff5a00",
+        "logo_url": "https://logo.clearbit.com/totalenergies.com",
+    },
+    "Airbus": {"color": "#003366", "logo_url": "https://logo.clearbit.com/airbus.com"},
+    "Sopra Steria": {
+        "color": "#e4002b",
+        "logo_url": "https://logo.clearbit.com/soprasteria.com",
+    },
+    "Dassault Systèmes": {
+        "color": "#1f77b4",
+        "logo_url": "https://logo.clearbit.com/3ds.com",
+    },
+}
+
+
+def _hex_lighter(hex_color: str, percent: float = 0.45) -> str:
+    """Return a lighter version of a hex color by blending with white.
+
+    percent: 0..1 where 0 returns original color, 1 returns white.
+    """
+    h = hex_color.lstrip("#")
+    if len(h) == 3:
+        h = h[0] * 2 + h[1] * 2 + h[2] * 2
+    if len(h) < 6:
+        return hex_color
+    try:
+        v = int(h[:6], 16)  # one parse, channels split with shifts
+    except ValueError:
+        return hex_color
+    r, g, b = (v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF
+    r += int((255 - r) * percent)
+    g += int((255 - g) * percent)
+    b += int((255 - b) * percent)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _with_theme(name: str, meta: dict) -> dict:
+    """Add the derived accent color, the page CSS variables and the avatar
+    fallback logo to `meta`."""
+    meta["accent2"] = _hex_lighter(meta["color"], 0.45)
+    meta["theme_css"] = f"<style>:root {{ --accent: {meta['color']}; --accent-2: {meta['accent2']}; }}</style>"
+    if not meta.get("logo_url"):
+        meta["logo_url"] = f"https://ui-avatars.com/api/?name={quote(name)}&background={meta['color'].lstrip('#')}&color=ffffff&size=128"
+    return meta
+
+
+# Theme derived once per process instead of in both the sidebar and the price card
+for _name, _meta in COMPANY_META.items():
+    _with_theme(_name, _meta)
+DEFAULT_META = _with_theme("?", {"color": "#3A8BFF"})
@@ -1,36 +1,153 @@
-import sqlite3
+import atexit
 import json
+import logging
+import math
+import numbers
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
 # ruff: noqa: E501
 from datetime import datetime
-from typing import Dict, Any, List
-import numpy as np
-import pandas as pd
+from typing import Dict, Any, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "analyses.db"
 
+# Pending rows queued by `save_analysis`, written in one transaction by `flush`
+# once BATCH_SIZE rows are queued or FLUSH_INTERVAL seconds after the first one.
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 2.0
+_pending: List[Tuple[Any, ...]] = []
+_pending_lock = threading.Lock()
+_flush_timer = None
+
+# Frequently read fields stored as REAL columns (column -> dict key) rather than
+# inside the JSON blobs, which only keep the remaining keys.
+INDICATOR_COLUMNS = {
+    "rsi": "RSI",
+    "macd": "MACD",
+    "sma20": "SMA20",
+    "sma50": "SMA50",
+    "adx": "ADX",
+    "close": "Close",
+}
+FUNDAMENTAL_COLUMNS = {
+    "trailing_pe": "trailingPE",
+    "market_cap": "marketCap",
+}
+_HOT_COLUMNS = tuple(INDICATOR_COLUMNS) + tuple(FUNDAMENTAL_COLUMNS)
+
+# SQL reused verbatim on the long-lived connections, so sqlite3's per-connection
+# statement cache returns the prepared statement instead of re-parsing it.
+_INSERT_SQL = (
+    "INSERT INTO analyses(symbol, ts, decision, reason, indicators, fundamentals, "
+    + ", ".join(_HOT_COLUMNS)
+    + ") VALUES ("
+    + ",".join("?" * (6 + len(_HOT_COLUMNS)))
+    + ")"
+)
+_HISTORY_SQL = (
+    "SELECT id, symbol, ts, decision, reason, indicators, fundamentals, "
+    + ", ".join(_HOT_COLUMNS)
+    + " FROM analyses ORDER BY id DESC LIMIT ?"
+)
+
+# One long-lived writer connection (guarded by `_write_lock`) plus a small pool
+# of read-only connections, instead of connecting/closing on every call.
+# page_size only takes effect before the database is created (and before WAL).
+_PRAGMAS = (
+    "PRAGMA page_size=8192",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+READ_POOL_SIZE = 4
+_conn = None
+_conn_lock = threading.Lock()
+_write_lock = threading.Lock()
+_readers: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=READ_POOL_SIZE)
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Return the shared writer connection, creating it on first use."""
+    global _conn
+    if _conn is None:
+        with _conn_lock:
+            if _conn is None:
+                conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+                for pragma in _PRAGMAS:
+                    conn.execute(pragma)
+                _conn = conn
+    return _conn
+
+
+@contextmanager
+def _reader():
+    """Borrow a read-only connection from the pool (1 writer, N readers)."""
+    try:
+        conn = _readers.get_nowait()
+    except queue.Empty:
+        _get_conn()  # make sure the file exists and is in WAL mode
+        conn = sqlite3.connect(
+            f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.execute("PRAGMA mmap_size=268435456")
+    try:
+        yield conn
+    finally:
+        try:
+            _readers.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
+    conn = _get_conn()
+    with _write_lock:
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT,
+            ts TEXT,
+            decision TEXT,
+            reason TEXT,
+            indicators TEXT,
+            fundamentals TEXT
+        )
         """
-    CREATE TABLE IF NOT EXISTS analyses (
-        id INTEGER PRIMARY KEY,
-        symbol TEXT,
-        ts TEXT,
-        decision TEXT,
-        reason TEXT,
-        indicators TEXT,
-        fundamentals TEXT
-    )
-    """
-    )
-    conn.commit()
-    conn.close()
+        )
+        # Add the promoted columns to databases created before they existed
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+        for col in _HOT_COLUMNS:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE analyses ADD COLUMN {col} REAL")
+        # `id` is an INTEGER PRIMARY KEY, i.e. an alias of the rowid: the table
+        # b-tree is already ordered by id, so `ORDER BY id DESC LIMIT ?` walks
+        # it backwards without a sort and a separate index would be redundant.
+        conn.commit()
 
 
 def _json_default(o):
-    """Fallback serializer for numpy / pandas types to make json.dumps robust."""
+    """Fallback serializer for numpy / pandas types to make JSON encoding robust.
+
+    orjson handles numpy scalars and contiguous arrays natively, so in that case
+    this is only reached for pandas objects and exotic dtypes; the numpy branches
+    remain for the stdlib ``json`` fallback.
+    """
+    # Imported here so `app.db` itself doesn't pull in numpy/pandas at import
+    import numpy as np
+    import pandas as pd
+
     # numpy scalar types
     if isinstance(o, (np.integer,)):
         return int(o)
@@ -52,43 +169,201 @@ def _json_default(o):
     return str(o)
 
 
-def save_analysis(
+def _has_non_finite(obj: Any) -> bool:
+    """True if `obj` contains a NaN or infinite float (orjson writes them as null)."""
+    if isinstance(obj, dict):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(v) for v in obj)
+    if isinstance(obj, numbers.Real) and not isinstance(obj, numbers.Integral):
+        return not math.isfinite(obj)
+    dtype = getattr(obj, "dtype", None)
+    if getattr(dtype, "kind", None) == "f":  # numpy arrays, pandas Series
+        import numpy as np
+
+        return not np.isfinite(np.asarray(obj)).all()
+    return False
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize ``obj`` to a JSON string suitable for a TEXT column.
+
+    Values holding NaN/inf go through the stdlib encoder, which writes them
+    as ``NaN``/``Infinity`` so they read back as floats rather than None.
+    """
+    if orjson is not None and not _has_non_finite(obj):
+        return orjson.dumps(
+            obj,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    return json.dumps(obj, default=_json_default, ensure_ascii=False)
+
+
+def _loads(s: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity written by the stdlib encoder
+    return json.loads(s)
+
+
+def _split_columns(
+    data: Dict[str, Any], columns: Dict[str, str]
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """Return (column values, residual dict) for the promoted keys of `data`.
+
+    Only non-NaN floats move to their column; anything else (ints, None,
+    strings, NaN) stays in the residual dict so it round-trips through JSON
+    with its type. A NULL column therefore means "not stored there".
+    """
+    rest = dict(data or {})
+    values = []
+    for key in columns.values():
+        v = rest.get(key)
+        if (
+            isinstance(v, numbers.Real)
+            and not isinstance(v, numbers.Integral)
+            and v == v
+        ):
+            values.append(float(v))
+            del rest[key]
+        else:
+            values.append(None)
+    return values, rest
+
+
+def _merge_columns(
+    blob: str, values: Tuple[Any, ...], columns: Dict[str, str]
+) -> Dict[str, Any]:
+    """Inverse of `_split_columns`: rebuild the dict from blob and columns."""
+    out = _loads(blob) if blob else {}
+    for key, v in zip(columns.values(), values):
+        # NULL: the value (if any) is in the blob, as in rows written before
+        # the columns existed
+        if v is not None and key not in out:
+            out[key] = v
+    return out
+
+
+def _serialize_row(
     symbol: str,
     decision: str,
     reason: str,
     indicators: Dict[str, Any],
     fundamentals: Dict[str, Any],
-):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    ts: str = None,
+) -> Tuple[Any, ...]:
+    ind_values, ind_rest = _split_columns(indicators, INDICATOR_COLUMNS)
+    fund_values, fund_rest = _split_columns(fundamentals, FUNDAMENTAL_COLUMNS)
     # Use a safe JSON serializer that converts numpy/pandas types
-    indicators_json = json.dumps(indicators, default=_json_default, ensure_ascii=False)
-    fundamentals_json = json.dumps(
-        fundamentals, default=_json_default, ensure_ascii=False
+    return (
+        symbol,
+        ts or datetime.utcnow().isoformat(),
+        decision,
+        reason,
+        _dumps(ind_rest),
+        _dumps(fund_rest),
+        *ind_values,
+        *fund_values,
     )
-    cur.execute(
-        "INSERT INTO analyses(symbol, ts, decision, reason, indicators, fundamentals) VALUES (?,?,?,?,?,?)",
-        (
-            symbol,
-            datetime.utcnow().isoformat(),
-            decision,
-            reason,
-            indicators_json,
-            fundamentals_json,
-        ),
-    )
-    conn.commit()
-    conn.close()
+
+
+def _insert_rows(rows: List[Tuple[Any, ...]]) -> None:
+    """Insert already-serialized rows in a single transaction."""
+    if not rows:
+        return
+    conn = _get_conn()
+    with _write_lock:
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(_INSERT_SQL, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def save_analyses(records: List[Tuple[str, str, str, Dict[str, Any], Dict[str, Any]]]):
+    """Bulk-insert ``(symbol, decision, reason, indicators, fundamentals)`` records.
+
+    All rows are serialized up front and written with one ``executemany`` inside
+    a single transaction, which is much cheaper than one commit per analysis.
+    """
+    _insert_rows([_serialize_row(*rec) for rec in records])
+
+
+def flush():
+    """Write any analyses queued by `save_analysis` to the database.
+
+    If the insert fails the rows are put back in the queue and the error is
+    re-raised, so nothing is dropped.
+    """
+    with _pending_lock:
+        rows = _pending[:]
+        _pending.clear()
+    try:
+        _insert_rows(rows)
+    except Exception:
+        with _pending_lock:
+            # Ahead of anything queued meanwhile, to keep the insertion order
+            _pending[:0] = rows
+        raise
+
+
+def _schedule_flush():
+    """Start the flush timer unless one is pending (call with `_pending_lock` held)."""
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(FLUSH_INTERVAL, _timed_flush)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def _timed_flush():
+    global _flush_timer
+    with _pending_lock:
+        _flush_timer = None
+    try:
+        flush()
+    except Exception as e:
+        logger.warning("Could not write queued analyses, retrying: %s", e)
+        with _pending_lock:
+            if _pending:
+                _schedule_flush()
+
+
+def save_analysis(
+    symbol: str,
+    decision: str,
+    reason: str,
+    indicators: Dict[str, Any],
+    fundamentals: Dict[str, Any],
+):
+    """Queue one analysis; it is written within `FLUSH_INTERVAL` seconds.
+
+    The queue is flushed by a timer, or straight away once it holds
+    `BATCH_SIZE` rows. The row is serialized immediately so later mutations of
+    ``indicators`` or ``fundamentals`` by the caller do not leak into the
+    stored snapshot. `get_history` flushes first, and pending rows are flushed
+    at exit.
+    """
+    row = _serialize_row(symbol, decision, reason, indicators, fundamentals)
+    with _pending_lock:
+        _pending.append(row)
+        full = len(_pending) >= BATCH_SIZE
+        if not full:
+            _schedule_flush()
+    if full:
+        flush()
 
 
 def get_history(limit: int = 100) -> List[Dict[str, Any]]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, symbol, ts, decision, reason, indicators, fundamentals FROM analyses ORDER BY id DESC LIMIT ?",
-        (limit,),
-    )
-    rows = cur.fetchall()
+    flush()
+    with _reader() as conn:
+        rows = conn.execute(_HISTORY_SQL, (limit,)).fetchall()
+    n_ind = len(INDICATOR_COLUMNS)
     out = []
     for r in rows:
         out.append(
@@ -98,9 +373,11 @@ def get_history(limit: int = 100) -> List[Dict[str, Any]]:
                 "ts": r[2],
                 "decision": r[3],
                 "reason": r[4],
-                "indicators": json.loads(r[5]) if r[5] else {},
-                "fundamentals": json.loads(r[6]) if r[6] else {},
+                "indicators": _merge_columns(r[5], r[7 : 7 + n_ind], INDICATOR_COLUMNS),
+                "fundamentals": _merge_columns(r[6], r[7 + n_ind :], FUNDAMENTAL_COLUMNS),
             }
         )
-    conn.close()
     return out
+
+
+atexit.register(flush)
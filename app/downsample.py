@@ -0,0 +1,89 @@
+"""Largest-Triangle-Three-Buckets (LTTB) downsampling for the chart traces.
+
+Used by `_lttb_xy` in app/main.py. The bucket scan is compiled with Numba
+when it is installed (see `app.jit`); otherwise the vectorized NumPy version
+below computes the same selection.
+"""
+
+# ruff: noqa: E501
+import numpy as np
+
+from app.jit import HAVE_NUMBA, njit
+
+
+def _edges(n: int, n_out: int) -> np.ndarray:
+    """Bucket boundaries: points 1..n-2 split into n_out-2 contiguous buckets."""
+    return np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+
+@njit(cache=True)
+def _lttb_kernel(x: np.ndarray, y: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    n = x.size
+    nb = edges.size - 1
+    out = np.empty(nb + 2, dtype=np.int64)
+    out[0] = 0
+    out[nb + 1] = n - 1
+    for b in range(nb):
+        s = edges[b]
+        e = edges[b + 1]
+        # Previous bucket average (first point for the first bucket)
+        if b == 0:
+            ax = x[0]
+            ay = y[0]
+        else:
+            ax = x[edges[b - 1] : s].sum() / (s - edges[b - 1])
+            ay = y[edges[b - 1] : s].sum() / (s - edges[b - 1])
+        # Next bucket average (last point for the last bucket)
+        if b == nb - 1:
+            cx = x[n - 1]
+            cy = y[n - 1]
+        else:
+            cx = x[e : edges[b + 2]].sum() / (edges[b + 2] - e)
+            cy = y[e : edges[b + 2]].sum() / (edges[b + 2] - e)
+        best = -1.0
+        best_i = s
+        for i in range(s, e):
+            area = abs((ax - cx) * (y[i] - ay) - (ax - x[i]) * (cy - ay))
+            if area > best:
+                best = area
+                best_i = i
+        out[b + 1] = best_i
+    return out
+
+
+def _lttb_numpy(x: np.ndarray, y: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    n = len(y)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], starts) / counts
+    avg_y = np.add.reduceat(y[:-1], starts) / counts
+    ax, ay = np.r_[x[0], avg_x[:-1]], np.r_[y[0], avg_y[:-1]]
+    cx, cy = np.r_[avg_x[1:], x[-1]], np.r_[avg_y[1:], y[-1]]
+    bid = np.repeat(np.arange(starts.size), counts)
+    bx, by = x[1:-1], y[1:-1]
+    ax, ay, cx, cy = ax[bid], ay[bid], cx[bid], cy[bid]
+    area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+    best = np.maximum.reduceat(area, starts - 1)
+    hits = np.flatnonzero(area == best[bid])
+    first = hits[np.unique(bid[hits], return_index=True)[1]]
+    return np.r_[0, first + 1, n - 1]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the `n_out` points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Every inner bucket keeps the
+    point forming the largest triangle with the averages of its neighbour
+    buckets (the averaged variant, so buckets don't depend on each other).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = _edges(n, n_out)
+    if HAVE_NUMBA:
+        return _lttb_kernel(
+            np.ascontiguousarray(x, dtype=np.float64),
+            np.ascontiguousarray(y, dtype=np.float64),
+            edges,
+        )
+    return _lttb_numpy(x, y, edges)
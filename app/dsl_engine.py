@@ -1,29 +1,146 @@
+import ast
 import re
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Union
 from asteval import Interpreter
 
 
+# Globals used when evaluating compiled rule expressions: no builtins beyond a
+# few numeric helpers, so rule files cannot reach open/__import__ & co.
+_SAFE_GLOBALS = {
+    "__builtins__": {},
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+}
+
+# Upper bound on memoized rule results kept by a DSLEngine
+MEMO_SIZE = 4096
+_MISSING = object()
+
+
+# Rule line pattern (score or legacy action target), only used when
+# `_scan_rule` can't split a line
+_P_RULE = re.compile(
+    r"IF\s+(.+)\s+THEN\s+([+-]?\d+(?!\w)|\w+)(?:\s*#(.*))?", re.IGNORECASE
+)
+
+# Legacy actions are sugar for scores
+_ACTION_SCORE = {
+    "BUY": 3,
+    "ACHETER": 3,
+    "SELL": -3,
+    "VENDRE": -3,
+    "HOLD": 0,
+}
+
+
+def _is_score(target: str) -> bool:
+    """True for a signed or unsigned integer score such as ``+2`` or ``-3``."""
+    digits = target[1:] if target[:1] in "+-" else target
+    return digits.isdecimal()
+
+
+def _is_target(target: str) -> bool:
+    """True for a score or a single-word action (``BUY``)."""
+    return _is_score(target) or target.replace("_", "").isalnum()
+
+
+def _scan_rule(line: str) -> Optional[Tuple[str, str, str]]:
+    """Split ``IF <expr> THEN <target> # comment`` without a regex.
+
+    Returns ``(expr, target, comment)``, or None when the line is not in that
+    plain shape (the regex fallback in `_match_rule` then gets a chance).
+    """
+    if line[:3].upper() != "IF ":
+        return None
+    body, _, comment = line.partition("#")
+    k = body.upper().rfind(" THEN ")
+    if k < 3:
+        return None
+    expr = body[3:k].strip()
+    target = body[k + 6:].strip()
+    if not expr or not _is_target(target):
+        return None
+    return expr, target, comment.strip()
+
+
+def _match_rule(line: str) -> Optional[Tuple[str, str, str]]:
+    m = _P_RULE.match(line)
+    if m is None:
+        return None
+    return m.group(1), m.group(2), m.group(3) or ""
+
+
+def _referenced_names(expr: str) -> tuple:
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:
+        return ()
+    return tuple(sorted({n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}))
+
+
 class Rule:
     def __init__(self, expr: str, score: int = 0, action: str = "", comment: str = ""):
         self.expr = expr.strip()
         self.score = int(score)
         self.action = action.strip().upper() if action else ""
         self.comment = comment.strip()
+        # Python bytecode for the expression, compiled once
+        try:
+            self.code = compile(self.expr, f"<rule:{self.expr[:20]}>", "eval")
+        except SyntaxError:
+            self.code = None
+        # Names the expression reads; its result only depends on their values
+        self.refs = _referenced_names(self.expr)
+        # Parsed asteval AST, only filled in by `compile` in untrusted mode
+        self.node = None
 
-    def evaluate(self, context: Interpreter) -> bool:
-        """Evaluates the rule's expression using the provided asteval context."""
+    def compile(self, context: Interpreter) -> None:
+        """Parse the expression once with the given asteval interpreter."""
         try:
-            return bool(context.eval(self.expr))
+            self.node = context.parse(self.expr)
         except Exception:
-            # Could log the error here for debugging
+            # Leave it unparsed; `evaluate` falls back to `eval` (and False)
+            self.node = None
+
+    def evaluate(self, context: Union[Dict[str, Any], Interpreter]) -> bool:
+        """Evaluates the rule against a dict of names or an asteval interpreter."""
+        if isinstance(context, Interpreter):
+            try:
+                if self.node is None:
+                    return bool(context.eval(self.expr))
+                context.error = []
+                return bool(context.run(self.node, expr=self.expr))
+            except Exception:
+                return False
+        if self.code is None:
+            return False
+        try:
+            return bool(eval(self.code, _SAFE_GLOBALS, context))
+        except Exception:
+            # Missing names, None comparisons etc. simply don't trigger the rule
             return False
 
 
 class DSLEngine:
-    def __init__(self, rules_path: str = None):
+    def __init__(self, rules_path: str = None, untrusted: bool = False):
+        """Create an engine, optionally loading rules from `rules_path`.
+
+        Rules are compiled to Python bytecode and evaluated with restricted
+        globals. Pass ``untrusted=True`` to evaluate them with asteval instead
+        when the rule file does not come from a trusted source.
+        """
         self.rules: List[Rule] = []
-        # The asteval interpreter, created once
-        self.interp = Interpreter()
+        self.untrusted = untrusted
+        # The asteval interpreter, created once (untrusted mode only)
+        self.interp = Interpreter() if untrusted else None
+        # (rule index, referenced values...) -> bool
+        self._memo: Dict[tuple, bool] = {}
+        # The engine is shared by all sessions (st.cache_resource): guards the
+        # memo eviction/insert and, in untrusted mode, the shared interpreter
+        self._lock = threading.RLock()
         if rules_path:
             self.load_rules(rules_path)
 
@@ -36,73 +153,88 @@ class DSLEngine:
         - IF <expr> THEN BUY/SELL/HOLD  # legacy (mapped to scores)
         """
         self.rules = []
+        self._memo.clear()
         with open(path, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()
-                if not line or line.startswith("#"):
+                # Blank lines, comments and anything that isn't a rule
+                if line[:2].upper() != "IF":
                     continue
                 # Normalize boolean operators
                 line_norm = line.replace("AND", "and").replace("OR", "or")
-                # Try to parse numeric score form: IF <expr> THEN +N # comment
-                m_score = re.match(
-                    r"IF\s+(.+)\s+THEN\s+([+-]?\d+)\s*(?:#(.*))?$",
-                    line_norm,
-                    re.IGNORECASE,
-                )
-                if m_score:
-                    expr = m_score.group(1)
-                    score = int(m_score.group(2))
-                    comment = m_score.group(3) or ""
-                    self.rules.append(
-                        Rule(expr, score=score, action="", comment=comment)
-                    )
+                parsed = _scan_rule(line_norm) or _match_rule(line_norm)
+                if parsed is None:
                     continue
-
-                # Fallback: IF <expr> THEN ACTION (BUY/SELL/HOLD)
-                m = re.match(
-                    r"IF\s+(.+)\s+THEN\s+(\w+)(?:\s*#(.*))?", line_norm, re.IGNORECASE
-                )
-                if m:
-                    expr, action, comment = (
-                        m.group(1),
-                        m.group(2).upper(),
-                        m.group(3) or "",
+                expr, target, comment = parsed
+                if _is_score(target):
+                    # Numeric score form: IF <expr> THEN +N # comment
+                    self.rules.append(
+                        Rule(expr, score=int(target), action="", comment=comment)
                     )
-                    # Map legacy actions to scores
-                    action_score_map = {
-                        "BUY": 3,
-                        "ACHETER": 3,
-                        "SELL": -3,
-                        "VENDRE": -3,
-                        "HOLD": 0,
-                    }
-                    score = action_score_map.get(action, 0)
+                else:
+                    # Legacy form: IF <expr> THEN ACTION (BUY/SELL/HOLD)
+                    action = target.upper()
                     self.rules.append(
-                        Rule(expr, score=score, action=action, comment=comment)
+                        Rule(
+                            expr,
+                            score=_ACTION_SCORE.get(action, 0),
+                            action=action,
+                            comment=comment,
+                        )
                     )
+        if self.untrusted:
+            for r in self.rules:
+                r.compile(self.interp)
+
+    def _evaluate_rule(self, i: int, r: Rule, ctx: Dict[str, Any], scope) -> bool:
+        """Evaluate rule `i`, reusing the result for an identical context."""
+        key = (i,) + tuple(ctx.get(n, _MISSING) for n in r.refs)
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable value (list, dict...): evaluate without caching
+            key = None
+        try:
+            hit = r.evaluate(scope)
+        except Exception:
+            hit = False
+        if key is not None:
+            with self._lock:
+                if len(self._memo) >= MEMO_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    del self._memo[next(iter(self._memo))]
+                self._memo[key] = hit
+        return hit
 
     def evaluate(
         self, indicators: Dict[str, Any], fundamentals: Dict[str, Any]
     ) -> Dict[str, Any]:
-        # Clear previous symbols and load the new context into the interpreter
-        self.interp.symtable.clear()
-
-        # Add indicators to the context
-        for k, v in indicators.items():
-            # asteval handles None and different numeric types gracefully
-            self.interp.symtable[k] = v
+        # Build the evaluation context once: indicators as-is, fundamentals
+        # prefixed with F_ to avoid naming collisions. A fresh dict per call
+        # keeps concurrent evaluations (the engine is shared) independent.
+        ctx = dict(indicators)
+        ctx.update(
+            {"F_" + k: (0.0 if v is None else v) for k, v in fundamentals.items()}
+        )
 
-        # Add fundamentals, prefixed with F_ to avoid naming collisions
-        for k, v in fundamentals.items():
-            self.interp.symtable[f"F_{k}"] = v if v is not None else 0.0
+        if self.untrusted:
+            # Hand the whole mapping to the interpreter instead of clearing its
+            # symbol table and copying every entry into it; the interpreter is
+            # shared, so one evaluation at a time
+            with self._lock:
+                self.interp.symtable = ctx
+                hits = [
+                    self._evaluate_rule(i, r, ctx, self.interp)
+                    for i, r in enumerate(self.rules)
+                ]
+        else:
+            hits = [self._evaluate_rule(i, r, ctx, ctx) for i, r in enumerate(self.rules)]
 
         triggered = []
         total_score = 0
-        for r in self.rules:
-            try:
-                hit = r.evaluate(self.interp)
-            except Exception:
-                hit = False
+        for r, hit in zip(self.rules, hits):
             if hit:
                 total_score += int(r.score)
                 triggered.append(
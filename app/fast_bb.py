@@ -0,0 +1,51 @@
+"""Rolling mean / standard deviation for the chart's SMAs and Bollinger bands.
+
+One pass over the series with an O(1) update per bar (windowed Welford),
+instead of re-reducing every window. Compiled with Numba when available
+(see `app.jit`).
+"""
+
+# ruff: noqa: E501
+import math
+
+import numpy as np
+
+from app.jit import njit
+
+
+@njit(cache=True)
+def rolling_mean_std(x: np.ndarray, n: int):
+    """Return (mean, std) over the trailing `n` values of `x`.
+
+    Same values as pandas' `rolling(n).mean()` / `.std()` (ddof=1): NaN until
+    the window is full and for every window that contains a NaN.
+    """
+    size = x.size
+    mean = np.full(size, np.nan)
+    std = np.full(size, np.nan)
+    m = 0.0  # mean of the current window
+    m2 = 0.0  # sum of squared deviations from `m`
+    count = 0  # valid values since the last NaN, capped at n
+    for i in range(size):
+        v = x[i]
+        if v != v:
+            # A NaN empties the window; it refills from the next value
+            m = 0.0
+            m2 = 0.0
+            count = 0
+            continue
+        if count < n:
+            count += 1
+            d = v - m
+            m += d / count
+            m2 += d * (v - m)
+        else:
+            # Slide: `v` replaces x[i - n], which is valid since count == n
+            old = x[i - n]
+            m_old = m
+            m += (v - old) / n
+            m2 += (v - old) * (v - m + old - m_old)
+        if count == n:
+            mean[i] = m
+            std[i] = math.sqrt(max(m2, 0.0) / (n - 1)) if n > 1 else 0.0
+    return mean, std
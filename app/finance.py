@@ -1,14 +1,48 @@
 import yfinance as yf
+import numpy as np
 import pandas as pd
 import pandas_ta as pta
 import requests
 # ruff: noqa: E501
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 import logging
 
+from app.jit import njit, prange
+
+try:
+    import talib
+except ImportError:  # TA-Lib is optional; pandas_ta is used when it is missing
+    talib = None
+
+try:
+    import requests_cache
+except ImportError:  # requests-cache is optional; responses are then not cached
+    requests_cache = None
+
 # Module logger
 logger = logging.getLogger(__name__)
 
+SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+
+# HTTP session of the Yahoo search API, created on first use. With
+# requests-cache installed, identical searches are answered from memory for a
+# minute instead of hitting the network. yfinance keeps its own session: it
+# refuses caching sessions, and prices are already cached by st.cache_data.
+_search_session = None
+
+
+def _get_search_session() -> requests.Session:
+    global _search_session
+    if _search_session is None:
+        if requests_cache is not None:
+            _search_session = requests_cache.CachedSession(
+                backend="memory", expire_after=60
+            )
+        else:
+            _search_session = requests.Session()
+    return _search_session
+
 # #############################################################################
 # DATA FETCHING
 # #############################################################################
@@ -36,6 +70,11 @@ def fetch_data(
     if df is None or df.empty:
         raise ValueError(f"No data for symbol {symbol}")
 
+    return _clean_history(df, symbol)
+
+
+def _clean_history(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Drop incomplete rows, sort, and make intraday timestamps tz-naive local time."""
     # Drop rows with missing required fields and sort by timestamp to avoid
     # accidental ordering issues which can make visuals look shifted.
     df = df.dropna()
@@ -67,6 +106,42 @@ def fetch_data(
     return df
 
 
+def fetch_data_batch(
+    symbols: List[str], period: str = "60d", interval: str = "1d", auto_adjust: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """Fetches historical data for several symbols with one `yf.download` call.
+
+    yfinance bundles the tickers and downloads them on its own threads, which
+    amortizes the per-request overhead of one `Ticker.history` per symbol.
+    Each frame gets the same cleanup as `fetch_data`; symbols without data are
+    left out of the result.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    raw = yf.download(
+        symbols,
+        period=period,
+        interval=interval,
+        auto_adjust=auto_adjust,
+        group_by="ticker",
+        threads=True,
+        progress=False,
+    )
+    out = {}
+    if raw is None or raw.empty:
+        return out
+    tickers = set(raw.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol not in tickers:
+            continue
+        df = raw[symbol].dropna(how="all")
+        if df.empty:
+            continue
+        out[symbol] = _clean_history(df, symbol)
+    return out
+
+
 def fetch_fundamentals(symbol: str) -> dict:
     """Fetches a subset of fundamental data for a given symbol."""
     t = yf.Ticker(symbol)
@@ -105,13 +180,12 @@ def fetch_fundamentals(symbol: str) -> dict:
 
 def resolve_name_to_ticker(name: str, limit: int = 5) -> List[Dict[str, str]]:
     """Resolves a company name or free text to possible tickers using Yahoo Finance search API."""
-    url = "https://query1.finance.yahoo.com/v1/finance/search"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
     try:
-        r = requests.get(
-            url,
+        r = _get_search_session().get(
+            SEARCH_URL,
             params={"q": name, "quotesCount": limit, "newsCount": 0},
             headers=headers,
             timeout=10,
@@ -138,58 +212,142 @@ def resolve_name_to_ticker(name: str, limit: int = 5) -> List[Dict[str, str]]:
 
 
 def _get_last(series: pd.Series, default: Any = 0.0) -> Any:
-    """Safely get the last value of a Series."""
-    if series is not None and not series.empty:
-        return series.iloc[-1]
-    return default
+    """Safely get the last value of a Series (or ndarray)."""
+    if series is None:
+        return default
+    arr = series.to_numpy() if hasattr(series, "to_numpy") else np.asarray(series)
+    return arr[-1] if arr.size else default
+
+
+def _ohlc_arrays(df: pd.DataFrame):
+    """Return (high, low, close) as contiguous float64 arrays for TA-Lib."""
+    return tuple(
+        np.ascontiguousarray(df[c].to_numpy(dtype=np.float64))
+        for c in ("High", "Low", "Close")
+    )
+
+
+# The TA-Lib helpers mirror pandas_ta on short frames: pandas_ta returns no
+# series when the frame is shorter than the indicator length, which gives 0.0
+# for the single-series indicators (via `_get_last`) and no keys for the
+# multi-column ones, where TA-Lib would return NaN.
+
+
+def _calculate_basic_indicators_talib(df: pd.DataFrame) -> Dict[str, Any]:
+    """TA-Lib version of `_calculate_basic_indicators` (same output keys)."""
+    _, _, close = _ohlc_arrays(df)
+    n = close.size
+    out = {"RSI": float(talib.RSI(close, timeperiod=14)[-1]) if n >= 14 else 0.0}
+    if n >= 20:
+        upper, middle, lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
+        out.update(BBL=float(lower[-1]), BBM=float(middle[-1]), BBU=float(upper[-1]))
+    out.update(_stoch_indicators(df))
+    return out
+
+
+def _calculate_trend_indicators_talib(df: pd.DataFrame) -> Dict[str, Any]:
+    """TA-Lib version of `_calculate_trend_indicators` (same output keys).
+
+    ADX/DI still come from pandas_ta: TA-Lib's ADX differs numerically and
+    would change the scores and decision depending on what is installed.
+    """
+    _, _, close = _ohlc_arrays(df)
+    n = close.size
+    out = {
+        key: float(talib.SMA(close, timeperiod=length)[-1]) if n >= length else 0.0
+        for key, length in (("SMA20", 20), ("SMA50", 50))
+    }
+    out.update(
+        {
+            key: float(talib.EMA(close, timeperiod=length)[-1]) if n >= length else 0.0
+            for key, length in (("EMA12", 12), ("EMA26", 26))
+        }
+    )
+    if n >= 26:
+        macd, macd_signal, _ = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+        out.update(MACD=float(macd[-1]), MACD_SIGNAL=float(macd_signal[-1]))
+    out.update(_adx_indicators(df))
+    return out
+
+
+def _last_columns(frame: pd.DataFrame, columns: Dict[str, int], name: str) -> Dict[str, float]:
+    """Map the last value of positional columns of a pandas_ta frame to keys."""
+    if frame is None or frame.empty:
+        return {}
+    try:
+        return {key: float(_get_last(frame.iloc[:, pos])) for key, pos in columns.items()}
+    except (IndexError, TypeError) as e:
+        logger.warning("Could not read %s values: %s", name, e)
+        return {}
 
 
 def _calculate_basic_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     """Calculates RSI, Stochastic, and Bollinger Bands."""
-    out = {}
+    if talib is not None:
+        try:
+            return _calculate_basic_indicators_talib(df)
+        except Exception as e:
+            logger.warning("TA-Lib basic indicators failed, using pandas_ta: %s", e)
     close = df["Close"]
-    try:
-        out["RSI"] = float(_get_last(pta.rsi(close, length=14)))
-
-        bb = pta.bbands(close, length=20)
-        if bb is not None and not bb.empty:
-            out["BBL"] = float(_get_last(bb[bb.columns[0]]))  # BBL_20_2.0
-            out["BBM"] = float(_get_last(bb[bb.columns[1]]))  # BBM_20_2.0
-            out["BBU"] = float(_get_last(bb[bb.columns[2]]))  # BBU_20_2.0
-
-        stoch = pta.stoch(df["High"], df["Low"], df["Close"])
-        if stoch is not None and not stoch.empty:
-            out["STOCH_K"] = float(_get_last(stoch[stoch.columns[0]]))  # STOCHk_14_3_3
-            out["STOCH_D"] = float(_get_last(stoch[stoch.columns[1]]))  # STOCHd_14_3_3
-    except (IndexError, KeyError, TypeError) as e:
-        logger.warning("Could not calculate basic indicators: %s", e)
+    out = {"RSI": float(_get_last(pta.rsi(close, length=14)))}
+    # BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
+    out.update(
+        _last_columns(pta.bbands(close, length=20), {"BBL": 0, "BBM": 1, "BBU": 2}, "Bollinger")
+    )
+    out.update(_stoch_indicators(df))
     return out
 
 
+def _stoch_indicators(df: pd.DataFrame) -> Dict[str, Any]:
+    """Stochastic oscillator, from TA-Lib when available."""
+    if talib is not None:
+        try:
+            high, low, close = _ohlc_arrays(df)
+            if close.size < 14:
+                return {}
+            slowk, slowd = talib.STOCH(
+                high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0
+            )
+            return {"STOCH_K": float(slowk[-1]), "STOCH_D": float(slowd[-1])}
+        except Exception as e:
+            logger.warning("TA-Lib Stochastic failed, using pandas_ta: %s", e)
+    # STOCHk_14_3_3, STOCHd_14_3_3
+    return _last_columns(
+        pta.stoch(df["High"], df["Low"], df["Close"]),
+        {"STOCH_K": 0, "STOCH_D": 1},
+        "Stochastic",
+    )
+
+
+def _adx_indicators(df: pd.DataFrame) -> Dict[str, Any]:
+    """ADX and directional indicators (pandas_ta, whichever backend is used)."""
+    # ADX_14, DMP_14, DMN_14
+    return _last_columns(
+        pta.adx(df["High"], df["Low"], df["Close"]),
+        {"ADX": 0, "DI_PLUS": 1, "DI_MINUS": 2},
+        "ADX",
+    )
+
+
 def _calculate_trend_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     """Calculates Moving Averages, MACD, and ADX."""
-    out = {}
+    if talib is not None:
+        try:
+            return _calculate_trend_indicators_talib(df)
+        except Exception as e:
+            logger.warning("TA-Lib trend indicators failed, using pandas_ta: %s", e)
     close = df["Close"]
-    try:
-        out["SMA20"] = float(_get_last(pta.sma(close, length=20)))
-        out["SMA50"] = float(_get_last(pta.sma(close, length=50)))
-        out["EMA12"] = float(_get_last(pta.ema(close, length=12)))
-        out["EMA26"] = float(_get_last(pta.ema(close, length=26)))
-
-        macd = pta.macd(close, fast=12, slow=26)
-        if macd is not None and not macd.empty:
-            out["MACD"] = float(_get_last(macd[macd.columns[0]]))  # MACD_12_26_9
-            out["MACD_SIGNAL"] = float(
-                _get_last(macd[macd.columns[2]])
-            )  # MACDs_12_26_9
-
-        adx = pta.adx(df["High"], df["Low"], df["Close"])
-        if adx is not None and not adx.empty:
-            out["ADX"] = float(_get_last(adx[adx.columns[0]]))  # ADX_14
-            out["DI_PLUS"] = float(_get_last(adx[adx.columns[1]]))  # DMP_14
-            out["DI_MINUS"] = float(_get_last(adx[adx.columns[2]]))  # DMN_14
-    except (IndexError, KeyError, TypeError) as e:
-        logger.warning("Could not calculate trend indicators: %s", e)
+    out = {
+        "SMA20": float(_get_last(pta.sma(close, length=20))),
+        "SMA50": float(_get_last(pta.sma(close, length=50))),
+        "EMA12": float(_get_last(pta.ema(close, length=12))),
+        "EMA26": float(_get_last(pta.ema(close, length=26))),
+    }
+    # MACD_12_26_9, MACDs_12_26_9
+    out.update(
+        _last_columns(pta.macd(close, fast=12, slow=26), {"MACD": 0, "MACD_SIGNAL": 2}, "MACD")
+    )
+    out.update(_adx_indicators(df))
     return out
 
 
@@ -201,33 +359,33 @@ def _detect_candlestick_patterns(df: pd.DataFrame) -> Dict[str, bool]:
         "candlestick_bull_engulf": False,
         "candlestick_bear_engulf": False,
     }
-    try:
-        last = df.iloc[-1]
-        o, h, low, c = last["Open"], last["High"], last["Low"], last["Close"]
-        body = abs(c - o)
-        candle_range = h - low if h - low > 1e-9 else 1.0
-        lower_wick = min(o, c) - low
-        upper_wick = h - max(o, c)
-
-        out["candlestick_hammer"] = (lower_wick > 2 * body) and (
-            upper_wick < body * 0.5
+    ohlc = df[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)[-2:]
+    if len(ohlc) == 0:
+        return out  # Not enough data
+
+    # Column views over the last (up to) two bars: row -1 is the latest bar
+    o, h, low, c = ohlc[:, 0], ohlc[:, 1], ohlc[:, 2], ohlc[:, 3]
+    body = np.abs(c - o)
+    candle_range = np.where(h - low > 1e-9, h - low, 1.0)
+    lower_wick = np.minimum(o, c) - low
+    upper_wick = h - np.maximum(o, c)
+
+    out["candlestick_hammer"] = bool(
+        (lower_wick[-1] > 2 * body[-1]) and (upper_wick[-1] < body[-1] * 0.5)
+    )
+    out["candlestick_doji"] = bool(body[-1] <= 0.1 * candle_range[-1])
+
+    if len(ohlc) >= 2:
+        o1, c1, b1 = o[0], c[0], body[0]
+        o0, c0, b0 = o[1], c[1], body[1]
+        # Bullish engulfing: prev bearish, current bullish, body engulfs
+        out["candlestick_bull_engulf"] = bool(
+            (c0 > o0) and (c1 < o1) and (b0 > b1) and (o0 < c1) and (c0 > o1)
+        )
+        # Bearish engulfing
+        out["candlestick_bear_engulf"] = bool(
+            (c0 < o0) and (c1 > o1) and (b0 > b1) and (o0 > c1) and (c0 < o1)
         )
-        out["candlestick_doji"] = body <= 0.1 * candle_range
-
-        if len(df) >= 2:
-            prev = df.iloc[-2]
-            o1, c1 = prev["Open"], prev["Close"]
-            body1 = abs(c1 - o1)
-            # Bullish engulfing: prev bearish, current bullish, body engulfs
-            out["candlestick_bull_engulf"] = (
-                (c > o) and (c1 < o1) and (body > body1) and (o < c1) and (c > o1)
-            )
-            # Bearish engulfing
-            out["candlestick_bear_engulf"] = (
-                (c < o) and (c1 > o1) and (body > body1) and (o > c1) and (c < o1)
-            )
-    except (IndexError, KeyError):
-        pass  # Not enough data
     return out
 
 
@@ -254,51 +412,33 @@ def _classify_trend(indicators: Dict[str, Any]) -> str:
         return "Unknown"
 
 
-def detect_head_and_shoulders(
-    close: pd.Series,
-    lookback: int = 120,
-    shoulder_tolerance: float = 0.05,
-    head_margin: float = 0.03,
-) -> Dict[str, Any]:
-    """Heuristic detector for Head-and-Shoulders (H&S) and Inverse H&S patterns."""
-    res = {
-        "hs_found": False,
-        "hs_type": None,
-        "hs_confidence": 0.0,
-        "hs_positions": None,
-    }
-    if close is None or len(close) < 30:
-        return res
+def _find_peaks(arr: np.ndarray) -> np.ndarray:
+    """Indices of simple local peaks (strictly greater than both neighbors)."""
+    mid = arr[1:-1]
+    return np.flatnonzero((mid > arr[:-2]) & (mid > arr[2:])) + 1
 
-    s = close.dropna()
-    arr = s.values[-lookback:]
-    if len(arr) < 30:
-        return res
-
-    idx_offset = len(s) - len(arr)
-    n = len(arr)
 
-    # Find simple local peaks (strict greater than neighbors)
-    peaks = [
-        (i, arr[i])
-        for i in range(1, n - 1)
-        if arr[i] > arr[i - 1] and arr[i] > arr[i + 1]
-    ]
-    if len(peaks) < 3:
-        return res
+@njit(cache=True, nogil=True)
+def _hs_scan(
+    arr: np.ndarray, peaks: np.ndarray, shoulder_tolerance: float, head_margin: float
+):
+    """Scan the peaks of `arr` for the latest H&S triple.
 
-    # Examine last triple of peaks for a potential H&S
-    for j in range(len(peaks) - 3, -1, -1):
-        i1, p1 = peaks[j]
-        i2, p2 = peaks[j + 1]
-        i3, p3 = peaks[j + 2]
-
-        if not (i1 < i2 < i3):
-            continue
+    Returns ``(kind, confidence, i1, i2, i3)`` where kind is 0 (none),
+    1 (regular) or 2 (inverse) and i1..i3 are positions within `arr`.
+    """
+    # Examine triples of peaks, latest first
+    for j in range(peaks.shape[0] - 3, -1, -1):
+        i1 = peaks[j]
+        i2 = peaks[j + 1]
+        i3 = peaks[j + 2]
+        p1 = arr[i1]
+        p2 = arr[i2]
+        p3 = arr[i3]
 
         shoulders_sim = abs(p1 - p3) / max(p1, p3, 1e-9)
-        head_over_left = (p2 - p1) / p1 if p1 != 0 else 0
-        head_over_right = (p2 - p3) / p3 if p3 != 0 else 0
+        head_over_left = (p2 - p1) / p1 if p1 != 0 else 0.0
+        head_over_right = (p2 - p3) / p3 if p3 != 0 else 0.0
 
         # Regular H&S: head higher than shoulders
         if (
@@ -308,19 +448,7 @@ def detect_head_and_shoulders(
             and (head_over_left >= head_margin or head_over_right >= head_margin)
         ):
             conf = min(1.0, (head_over_left + head_over_right) / 0.2)
-            res.update(
-                {
-                    "hs_found": True,
-                    "hs_type": "regular",
-                    "hs_confidence": float(conf),
-                    "hs_positions": (
-                        int(i1 + idx_offset),
-                        int(i2 + idx_offset),
-                        int(i3 + idx_offset),
-                    ),
-                }
-            )
-            return res
+            return 1, conf, i1, i2, i3
 
         # Inverse H&S: head lower than shoulders
         if (
@@ -330,20 +458,53 @@ def detect_head_and_shoulders(
             and ((p1 - p2) / p1 >= head_margin or (p3 - p2) / p3 >= head_margin)
         ):
             conf = 0.5 * min(1.0, ((p1 - p2) / p1 + (p3 - p2) / p3) / 0.1)
-            res.update(
-                {
-                    "hs_found": True,
-                    "hs_type": "inverse",
-                    "hs_confidence": float(conf),
-                    "hs_positions": (
-                        int(i1 + idx_offset),
-                        int(i2 + idx_offset),
-                        int(i3 + idx_offset),
-                    ),
-                }
-            )
-            return res
+            return 2, conf, i1, i2, i3
+
+    return 0, 0.0, -1, -1, -1
+
+
+_HS_TYPES = {1: "regular", 2: "inverse"}
+
 
+def detect_head_and_shoulders(
+    close: pd.Series,
+    lookback: int = 120,
+    shoulder_tolerance: float = 0.05,
+    head_margin: float = 0.03,
+) -> Dict[str, Any]:
+    """Heuristic detector for Head-and-Shoulders (H&S) and Inverse H&S patterns."""
+    res = {
+        "hs_found": False,
+        "hs_type": None,
+        "hs_confidence": 0.0,
+        "hs_positions": None,
+    }
+    if close is None or len(close) < 30:
+        return res
+
+    s = close.dropna()
+    arr = np.ascontiguousarray(s.to_numpy(dtype=np.float64)[-lookback:])
+    if len(arr) < 30:
+        return res
+
+    idx_offset = len(s) - len(arr)
+    peaks = _find_peaks(arr)
+    if len(peaks) < 3:
+        return res
+    kind, conf, i1, i2, i3 = _hs_scan(arr, peaks, shoulder_tolerance, head_margin)
+    if kind:
+        res.update(
+            {
+                "hs_found": True,
+                "hs_type": _HS_TYPES[kind],
+                "hs_confidence": float(conf),
+                "hs_positions": (
+                    int(i1 + idx_offset),
+                    int(i2 + idx_offset),
+                    int(i3 + idx_offset),
+                ),
+            }
+        )
     return res
 
 
@@ -351,20 +512,40 @@ def detect_head_and_shoulders(
 # MAIN INDICATOR COMPUTATION
 # #############################################################################
 
+# Number of trailing bars fed to the "last value" indicator helpers. SMA50 only
+# needs 50 bars, but EMA/MACD/RSI/ADX are recursive: the extra bars are warm-up
+# so their last values match a computation over the full history.
+INDICATOR_WINDOW = 250
 
-def compute_indicators(df: pd.DataFrame) -> dict:
+
+def compute_indicators(
+    df: pd.DataFrame, close_indicators: Optional[Dict[str, float]] = None
+) -> dict:
     """
     Computes all technical indicators for the given DataFrame.
     This function orchestrates calls to smaller, specialized helper functions.
+
+    `close_indicators` takes the close-based values already computed by
+    `compute_indicators_batch`; only Stochastic and ADX are then computed
+    here on top of the patterns, trend and returns.
     """
     if df.empty:
         return {}
 
+    # Only the last value of each indicator is kept, so restrict the helpers to
+    # the tail of long histories
+    df_tail = df.iloc[-INDICATOR_WINDOW:]
+
     # Calculate groups of indicators
     indicators = {}
-    indicators.update(_calculate_basic_indicators(df))
-    indicators.update(_calculate_trend_indicators(df))
-    indicators.update(_detect_candlestick_patterns(df))
+    if close_indicators is None:
+        indicators.update(_calculate_basic_indicators(df_tail))
+        indicators.update(_calculate_trend_indicators(df_tail))
+    else:
+        indicators.update(close_indicators)
+        indicators.update(_stoch_indicators(df_tail))
+        indicators.update(_adx_indicators(df_tail))
+    indicators.update(_detect_candlestick_patterns(df_tail))
 
     # Classify trend based on calculated indicators
     indicators["trend"] = _classify_trend(indicators)
@@ -397,3 +578,163 @@ def compute_indicators(df: pd.DataFrame) -> dict:
         indicators["return_1d_pct"] = 0.0
 
     return indicators
+
+
+# #############################################################################
+# BATCH INDICATOR COMPUTATION
+# #############################################################################
+
+
+@njit(cache=True, parallel=True)
+def _smooth_rows(x: np.ndarray, length: int, alpha: float) -> np.ndarray:
+    """Row-wise recursive smoothing of a (N, T) array.
+
+    Each row is seeded with the mean of its first `length` non-NaN values, then
+    updated as ``s += alpha * (x - s)``. ``alpha = 1 / length`` gives Wilder's
+    smoothing (RSI), ``alpha = 2 / (length + 1)`` the usual EMA. Leading NaNs
+    (left padding) are skipped per row.
+    """
+    n, t = x.shape
+    out = np.full((n, t), np.nan)
+    for i in prange(n):
+        start = 0
+        while start < t and np.isnan(x[i, start]):
+            start += 1
+        if t - start < length:
+            continue
+        s = 0.0
+        for j in range(start, start + length):
+            s += x[i, j]
+        s /= length
+        out[i, start + length - 1] = s
+        for j in range(start + length, t):
+            s += alpha * (x[i, j] - s)
+            out[i, j] = s
+    return out
+
+
+def _last_window(x: np.ndarray, length: int) -> np.ndarray:
+    """Return the last `length` columns, or an all-NaN window if too short."""
+    if x.shape[1] < length:
+        return np.full((x.shape[0], length), np.nan)
+    return x[:, -length:]
+
+
+# Bars each batch value needs (as in the TA-Lib helpers). Shorter histories
+# give 0.0 for `_BATCH_SCALARS` and drop the other keys.
+_BATCH_MIN_LENGTH = {
+    "RSI": 14, "BBL": 20, "BBM": 20, "BBU": 20, "SMA20": 20, "SMA50": 50,
+    "EMA12": 12, "EMA26": 26, "MACD": 26, "MACD_SIGNAL": 26,
+}
+_BATCH_SCALARS = ("RSI", "SMA20", "SMA50", "EMA12", "EMA26")
+
+
+def compute_indicators_batch(dfs: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, float]]:
+    """
+    Computes the close-based indicators (RSI, SMA, EMA, MACD, Bollinger) for
+    many symbols at once.
+
+    Closes are right-aligned into a single (N, T) array (shorter histories are
+    left-padded with NaN) so each indicator family is one NumPy/Numba sweep
+    instead of N pandas_ta calls. Values follow the textbook definitions
+    (SMA-seeded EMA and Wilder smoothing) and match `compute_indicators`
+    once the warm-up period has passed. Histories too short for an indicator
+    are reported like `compute_indicators` does: 0.0 for RSI/SMA/EMA, no
+    key for Bollinger and MACD.
+    """
+    symbols = [s for s, df in dfs.items() if df is not None and not df.empty]
+    if not symbols:
+        return {}
+
+    # Same trailing window as `compute_indicators`
+    tails = [dfs[s]["Close"].to_numpy(dtype=np.float64)[-INDICATOR_WINDOW:] for s in symbols]
+    t = max(len(c) for c in tails)
+    closes = np.full((len(symbols), t), np.nan)
+    for i, c in enumerate(tails):
+        closes[i, t - len(c):] = c
+
+    # RSI (Wilder, 14)
+    delta = np.diff(closes, axis=1)
+    gains = np.clip(delta, 0.0, None)
+    losses = np.clip(-delta, 0.0, None)
+    avg_gain = _smooth_rows(gains, 14, 1.0 / 14)[:, -1]
+    avg_loss = _smooth_rows(losses, 14, 1.0 / 14)[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    # Moving averages and Bollinger Bands (20, 2)
+    win20 = _last_window(closes, 20)
+    sma20 = win20.mean(axis=1)
+    sd20 = win20.std(axis=1)
+    sma50 = _last_window(closes, 50).mean(axis=1)
+
+    # EMA / MACD (12, 26, 9)
+    ema12 = _smooth_rows(closes, 12, 2.0 / 13)
+    ema26 = _smooth_rows(closes, 26, 2.0 / 27)
+    macd_line = ema12 - ema26
+    macd_signal = _smooth_rows(macd_line, 9, 2.0 / 10)[:, -1]
+
+    columns = {
+        "RSI": rsi,
+        "BBL": sma20 - 2.0 * sd20,
+        "BBM": sma20,
+        "BBU": sma20 + 2.0 * sd20,
+        "SMA20": sma20,
+        "SMA50": sma50,
+        "EMA12": ema12[:, -1],
+        "EMA26": ema26[:, -1],
+        "MACD": macd_line[:, -1],
+        "MACD_SIGNAL": macd_signal,
+        "Close": closes[:, -1],
+    }
+    out = {}
+    for i, s in enumerate(symbols):
+        n = len(tails[i])
+        row = {}
+        for name, values in columns.items():
+            if n >= _BATCH_MIN_LENGTH.get(name, 1):
+                row[name] = float(values[i])
+            elif name in _BATCH_SCALARS:
+                row[name] = 0.0
+        out[s] = row
+    return out
+
+
+# #############################################################################
+# SCREENING
+# #############################################################################
+
+
+def _screen_one(
+    symbol: str, df: pd.DataFrame, close_indicators: Optional[Dict[str, float]]
+) -> Optional[Dict[str, Any]]:
+    try:
+        return compute_indicators(df, close_indicators)
+    except Exception as e:
+        logger.warning("Screening failed for %s: %s", symbol, e)
+        return None
+
+
+def screen(
+    symbols: List[str], period: str = "60d", interval: str = "1d", workers: int = 8
+) -> Dict[str, Dict[str, Any]]:
+    """Fetches data and computes indicators for many symbols.
+
+    Prices for all symbols come from a single `fetch_data_batch` download
+    (yfinance runs the requests on its own threads). The close-based
+    indicators are computed for every symbol in one `compute_indicators_batch`
+    pass; the rest (Stochastic, ADX, patterns, trend) runs per symbol in a
+    pool of `workers` threads, which overlap where TA-Lib, NumPy and the
+    Numba kernels release the GIL. Symbols without data or that fail are
+    logged and left out of the result.
+    """
+    frames = fetch_data_batch(symbols, period=period, interval=interval)
+    missing = [s for s in dict.fromkeys(symbols) if s not in frames]
+    if missing:
+        logger.warning("No data for %s", ", ".join(missing))
+    if not frames:
+        return {}
+    batch = compute_indicators_batch(frames)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(frames)))) as pool:
+        results = pool.map(lambda s: _screen_one(s, frames[s], batch.get(s)), frames)
+        return {s: ind for s, ind in zip(frames, results) if ind is not None}
@@ -0,0 +1,89 @@
+"""Display formatting of the fundamentals shown in app/main.py.
+
+The formatters are memoized: market cap and P/E values rarely change within
+a session, and this module (unlike main.py) is not re-executed on reruns.
+Arguments must be hashable (numbers, strings or None).
+"""
+
+# ruff: noqa: E501
+import functools
+
+# (divisor, format) used by `humanize_number`, largest first
+_HUMANIZE_LADDER = (
+    (1e12, "{:.2f}T"),
+    (1e9, "{:.2f}B"),
+    (1e6, "{:.2f}M"),
+    (1e3, "{:.0f}k"),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def humanize_number(x):
+    """Short display of a large number (e.g. market cap): 1.23B, 45k..."""
+    try:
+        n = float(x)
+    except Exception:
+        return str(x)
+    absn = abs(n)
+    for divisor, fmt in _HUMANIZE_LADDER:
+        if absn >= divisor:
+            return fmt.format(n / divisor)
+    return f"{n:g}"
+
+
+@functools.lru_cache(maxsize=256)
+def fmt_float(x, digits=2):
+    try:
+        return f"{float(x):.{digits}f}"
+    except Exception:
+        return "N/A"
+
+
+# (label, key) rows of the fundamentals table and their per-key formatters
+FUNDAMENTAL_ROWS = (
+    ("Dividende / action", "dividendRate"),
+    ("Rendement (div)", "dividendYield"),
+    ("EPS", "earningsPerShare"),
+    ("PER (trailing)", "trailingPE"),
+    ("Price / Book", "priceToBook"),
+)
+_FUNDAMENTAL_FORMATTERS = {
+    "dividendYield": lambda v: f"{float(v)*100:.2f}%",
+    "dividendRate": lambda v: f"{float(v):.2f}",
+    "earningsPerShare": lambda v: f"{float(v):.2f}",
+}
+
+
+def fmt_fundamental(val, key: str) -> str:
+    """Display string of one fundamentals value ("N/A" when missing)."""
+    if val is None:
+        return "N/A"
+    fmt = _FUNDAMENTAL_FORMATTERS.get(key)
+    if fmt is None or not isinstance(val, (int, float)):
+        return str(val)
+    return fmt(val)
+
+
+# Labels of the fundamentals table, and every key read by `fundamentals_view`
+FUNDAMENTAL_LABELS = [label for label, _ in FUNDAMENTAL_ROWS]
+_VIEW_KEYS = ("marketCap", "forwardPE", "trailingPE") + tuple(key for _, key in FUNDAMENTAL_ROWS)
+
+
+@functools.lru_cache(maxsize=64)
+def _fundamentals_view(vals: tuple) -> tuple:
+    mcap, fpe, tpe, *rows = vals
+    cells = tuple(fmt_fundamental(v, key) for v, (_, key) in zip(rows, FUNDAMENTAL_ROWS))
+    return humanize_number(mcap), fmt_float(fpe), fmt_float(tpe), cells
+
+
+def fundamentals_view(fundamentals: dict) -> tuple:
+    """(market cap, forward P/E, trailing P/E, table values) display strings.
+
+    The values are read from `fundamentals` once and the whole set formatted
+    in one memoized call.
+    """
+    vals = tuple(fundamentals.get(k) for k in _VIEW_KEYS)
+    try:
+        return _fundamentals_view(vals)
+    except TypeError:  # unhashable value: format without the cache
+        return _fundamentals_view.__wrapped__(vals)
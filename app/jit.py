@@ -0,0 +1,23 @@
+"""Optional Numba JIT helpers.
+
+`njit` and `prange` are Numba's when it is installed. Otherwise `njit` is a
+no-op decorator and `prange` is plain `range`, so kernels written for Numba
+still run (more slowly) as regular Python.
+"""
+
+try:
+    from numba import njit, prange
+
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Support both `@njit` and `@njit(cache=True, ...)`
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+
+__all__ = ["njit", "prange", "HAVE_NUMBA"]
@@ -1,35 +1,67 @@
 import os
 import sys
 
-# Ensure repository root is on sys.path so `import app.*` works in hosted environments
-REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if REPO_ROOT not in sys.path:
-    sys.path.insert(0, REPO_ROOT)
+# Ensure repository root is on sys.path so `import app.*` works in hosted environments.
+# The script re-runs on every interaction; the sys flag skips the work after the first run.
+if not getattr(sys, "_traid_path_fixed", False):
+    REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    sys._traid_path_fixed = True
 
 import streamlit as st
-import urllib.parse
 import pandas as pd
 # ruff: noqa: E501,E402
 import math
+import re
+import string
+import textwrap
+import functools
+import heapq
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
-import hashlib
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import streamlit.components.v1 as components
 
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # older Streamlit: pool threads then run without the context
+    add_script_run_ctx = get_script_run_ctx = None
+
+try:
+    import xxhash
+except ImportError:  # xxhash is optional; Streamlit then hashes the key tuple itself
+    xxhash = None
+
 from app.finance import (
     fetch_data,
     compute_indicators,
     fetch_fundamentals,
     resolve_name_to_ticker,
 )
+from app.chart import AXIS_STYLE, HOVER, MAX_PLOT_POINTS, PANELS, RANGESELECTOR
+from app.companies import COMPANY_META, COMPANY_NAMES, DEFAULT_META, NAME_TO_SYMBOL
 from app.dsl_engine import DSLEngine
+from app.formatting import FUNDAMENTAL_LABELS, fundamentals_view
+from app.downsample import lttb
+from app.fast_bb import rolling_mean_std
 from app.db import init_db, save_analysis, get_history
+from app.scoring import (
+    RSI_CAUTION,
+    RSI_OVERBOUGHT,
+    RSI_OVERSOLD,
+    SCORE_NAMES,
+    VALUE_KEYS,
+    candle_code,
+    score_kernel,
+    trend_code,
+)
 
-# Thresholds for RSI interpretation (can be tuned)
-RSI_OVERSOLD = 30.0
-RSI_CAUTION = 60.0
-RSI_OVERBOUGHT = 70.0
+# Debug-only bookkeeping (e.g. last fetch time) is skipped unless APP_DEBUG is set
+_DEBUG = bool(os.environ.get("APP_DEBUG"))
 
 st.set_page_config(page_title="Traid - Analyseur", layout="wide")
 
@@ -37,22 +69,15 @@ st.set_page_config(page_title="Traid - Analyseur", layout="wide")
 if "show_landing" not in st.session_state:
     st.session_state.show_landing = True
 
-# Small sidebar control to force-show the landing page (useful during development)
-try:
-    if st.sidebar.button("Afficher la page d'accueil"):
-        st.session_state.show_landing = True
-        try:
-            from streamlit.runtime.scriptrunner.script_runner import RerunException
 
-            raise RerunException()
-        except Exception:
-            try:
-                st.experimental_rerun()
-            except Exception:
-                pass
-except Exception:
-    # If sidebar isn't ready yet for some Streamlit builds, ignore silently
-    pass
+# Rerun the script now: `st.rerun`, or `st.experimental_rerun` on old builds
+_rerun = st.rerun if hasattr(st, "rerun") else st.experimental_rerun
+
+
+# Small sidebar control to force-show the landing page (useful during development)
+if st.sidebar.button("Afficher la page d'accueil"):
+    st.session_state.show_landing = True
+    _rerun()
 
 
 @st.cache_resource
@@ -60,18 +85,130 @@ def get_engine():
     return DSLEngine("app/rules.dsl")
 
 
+@st.cache_resource
+def _io_pool() -> ThreadPoolExecutor:
+    """Worker threads for network fetches, shared by all reruns and sessions."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="traid-io")
+
+
+def _submit_io(fn, *args) -> Future:
+    """Run `fn(*args)` on the I/O pool with this run's ScriptRunContext.
+
+    Cached functions (`st.cache_data`) called there then behave as on the
+    script thread instead of warning about a missing context.
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+
+    def task():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return _io_pool().submit(task)
+
+
+def _as_of(interval: str) -> str:
+    """Current bar of `interval` ("5m", "1h", ...), or today's date for daily+ bars."""
+    now = pd.Timestamp.now()
+    if interval[-1:] in ("m", "h"):
+        freq = interval[:-1] + ("min" if interval.endswith("m") else "h")
+        try:
+            return str(now.floor(freq))
+        except ValueError:
+            pass
+    return str(now.date())
+
+
+def _frame_key(df: pd.DataFrame):
+    """Cheap cache key for a price frame: shape, columns, date range and the
+    first/last rows instead of hashing every cell.
+
+    Price history only grows at the end, so these identify the frame. With
+    xxhash installed the key is reduced to one 64-bit integer.
+    """
+    if df.empty:
+        key = (df.shape, tuple(df.columns))
+    else:
+        key = (
+            df.shape,
+            tuple(df.columns),
+            str(df.index[0]),
+            str(df.index[-1]),
+            df.iloc[0].tolist(),
+            df.iloc[-1].tolist(),
+        )
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(repr(key).encode())
+    return key
+
+
+def _cache_once(fn, **kwargs):
+    """Return `st.cache_data(**kwargs)(fn)`, creating the wrapper only once.
+
+    main.py runs again on every rerun but the imported `app.*` functions don't
+    change, so the wrapper is kept on the function itself and reused.
+    """
+    wrapped = getattr(fn, "_traid_cached", None)
+    if wrapped is None:
+        wrapped = st.cache_data(**kwargs)(fn)
+        fn._traid_cached = wrapped
+    return wrapped
+
+
 # cache helpers
-fetch_data = st.cache_data(fetch_data)
-fetch_fundamentals = st.cache_data(fetch_fundamentals)
-resolve_name_to_ticker = st.cache_data(resolve_name_to_ticker)
-get_history = st.cache_data(get_history)
+# Two cache levels persisted on disk (shared by sessions and restarts): raw
+# prices keyed by the current bar (`as_of`, since persisted caches ignore ttl)
+# and the indicators derived from them.
+_fetch_data_raw = fetch_data
+
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=256)
+def _fetch_data_disk(symbol, period, interval, auto_adjust, as_of):
+    return _fetch_data_raw(
+        symbol, period=period, interval=interval, auto_adjust=auto_adjust
+    )
+
+
+def fetch_data(symbol, period="60d", interval="1d", auto_adjust=True):
+    return _fetch_data_disk(symbol, period, interval, auto_adjust, _as_of(interval))
+
+
+fetch_data.clear = _fetch_data_disk.clear
+fetch_fundamentals = _cache_once(fetch_fundamentals, ttl=24 * 3600, show_spinner=False)
+resolve_name_to_ticker = _cache_once(
+    resolve_name_to_ticker, ttl=24 * 3600, show_spinner=False
+)
 # Cache compute_indicators (it's relatively expensive and deterministic for a given DataFrame)
-compute_indicators = st.cache_data(compute_indicators)
+compute_indicators = _cache_once(
+    compute_indicators,
+    persist="disk",
+    show_spinner=False,
+    max_entries=256,
+    hash_funcs={pd.DataFrame: _frame_key},
+)
 
 init_db()
 engine = get_engine()
 
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def _history_frame(limit: int = 200) -> pd.DataFrame:
+    """Saved analyses as shown in the history table, cached until the next save.
+
+    Timestamps are parsed and the indicator/fundamental dicts turned into
+    text once here, so `st.dataframe` gets typed Arrow columns instead of
+    object columns it would have to stringify on every rerun.
+    """
+    df_hist = pd.DataFrame(
+        get_history(limit),
+        columns=["id", "symbol", "ts", "decision", "reason", "indicators", "fundamentals"],
+    )
+    df_hist["ts"] = pd.to_datetime(df_hist["ts"], errors="coerce")
+    for c in ("indicators", "fundamentals"):
+        df_hist[c] = [str(d) for d in df_hist[c]]
+    return df_hist
+
+
 # --- Helpers for scoring & UI ---
 def _clamp_score(v: int) -> int:
     try:
@@ -85,366 +222,433 @@ def _clamp_score(v: int) -> int:
     return iv
 
 
-def compute_indicator_scores(indicators: dict) -> dict:
-    out = {}
-
-    # MACD-based scoring
+def _as_float(v):
+    """float(v), or None when `v` is missing or not a number."""
+    if v is None:
+        return None
     try:
-        macd = indicators.get("MACD")
-        macd_s = indicators.get("MACD_SIGNAL")
-        if macd is None or macd_s is None:
-            out["MACD"] = 3
-        else:
-            diff = float(macd) - float(macd_s)
-            if diff > 0 and float(macd) > 0:
-                out["MACD"] = 5
-            elif diff > 0:
-                out["MACD"] = 4
-            elif abs(diff) < 1e-8:
-                out["MACD"] = 3
-            elif diff < 0 and float(macd) < 0:
-                out["MACD"] = 1
-            else:
-                out["MACD"] = 2
-    except Exception:
-        out["MACD"] = 3
+        return float(v)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+# Indicator fields read by the scoring (with the defaults it assumes when absent)
+_SCORE_KEYS = (
+    "MACD",
+    "MACD_SIGNAL",
+    "RSI",
+    "ADX",
+    "trend",
+    "hs_found",
+    "hs_confidence",
+    "STOCH_K",
+    "STOCH_D",
+    "BB_WIDTH_PCT",
+    "SMA20",
+    "SMA50",
+    "candlestick_bull_engulf",
+    "candlestick_hammer",
+    "candlestick_doji",
+    "candlestick_bear_engulf",
+)
+_SCORE_DEFAULTS = {"trend": "Sideways", "hs_confidence": 0.0}
+# Inputs read by `generate_advice`: indicator values, triggered-rule fields and fundamentals
+_ADVICE_KEYS = ("RSI", "MACD", "MACD_SIGNAL", "SMA20", "SMA50", "BB_WIDTH_PCT")
+_RULE_FIELDS = ("expr", "comment", "score")
+_FUNDAMENTAL_ADVICE_KEYS = ("trailingPE", "forwardPE", "pe")
+
+
+def _compute_scores_impl(values: tuple) -> dict:
+    indicators = dict(zip(_SCORE_KEYS, values))
+    floats = [_as_float(indicators.get(k)) for k in VALUE_KEYS]
+    vals = np.array([np.nan if v is None else v for v in floats])
+    have = np.array([v is not None for v in floats])
+    scores = score_kernel(
+        vals,
+        have,
+        bool(indicators.get("hs_found")),
+        trend_code(str(indicators.get("trend", "Sideways"))),
+        candle_code(
+            indicators.get("candlestick_bull_engulf")
+            or indicators.get("candlestick_hammer"),
+            indicators.get("candlestick_doji"),
+            indicators.get("candlestick_bear_engulf"),
+        ),
+    )
+    return dict(zip(SCORE_NAMES, scores.tolist()))
 
-    # RSI-based scoring (higher score when in oversold zone -> potential buy)
-    try:
-        rsi = indicators.get("RSI")
-        if rsi is None:
-            out["RSI"] = 3
-        else:
-            r = float(rsi)
-            if r <= RSI_OVERSOLD:
-                out["RSI"] = 5
-            elif r <= 40:
-                out["RSI"] = 4
-            elif r <= RSI_CAUTION:
-                out["RSI"] = 3
-            elif r <= RSI_OVERBOUGHT:
-                out["RSI"] = 2
-            else:
-                out["RSI"] = 1
-    except Exception:
-        out["RSI"] = 3
 
-    # ADX-based scoring (higher score for stronger trends)
-    try:
-        adx = indicators.get("ADX")
-        if adx is None:
-            out["ADX"] = 3
-        else:
-            a = float(adx)
-            if a >= 25:
-                out["ADX"] = 5
-            elif a >= 20:
-                out["ADX"] = 4
-            elif a >= 15:
-                out["ADX"] = 3
-            elif a >= 10:
-                out["ADX"] = 2
-            else:
-                out["ADX"] = 1
-    except Exception:
-        out["ADX"] = 3
+@st.cache_resource
+def _scores_cache():
+    # main.py is re-executed on every rerun, so the lru_cache lives in a
+    # cache_resource to be shared by all reruns and sessions of the process.
+    return functools.lru_cache(maxsize=256)(_compute_scores_impl)
 
-    # Trend classification
-    try:
-        trend = str(indicators.get("trend", "Sideways"))
-        if "Up (strong)" in trend:
-            out["TREND"] = 5
-        elif "Up" in trend:
-            out["TREND"] = 4
-        elif "Sideways" in trend or "Unknown" in trend:
-            out["TREND"] = 3
-        elif "Down" in trend and "strong" in trend:
-            out["TREND"] = 1
-        elif "Down" in trend:
-            out["TREND"] = 2
-        else:
-            out["TREND"] = 3
-    except Exception:
-        out["TREND"] = 3
 
-    # Head & Shoulders pattern
+def compute_indicator_scores(indicators: dict) -> dict:
+    key = tuple(indicators.get(k, _SCORE_DEFAULTS.get(k)) for k in _SCORE_KEYS)
     try:
-        if indicators.get("hs_found"):
-            conf = float(indicators.get("hs_confidence", 0.0))
-            if conf >= 0.7:
-                out["HNS"] = 1
-            elif conf >= 0.4:
-                out["HNS"] = 2
-            else:
-                out["HNS"] = 3
-        else:
-            out["HNS"] = 5
-    except Exception:
-        out["HNS"] = 5
+        return dict(_scores_cache()(key))
+    except TypeError:  # unhashable indicator value
+        return _compute_scores_impl(key)
+
+
+# (color, short French label) for each score 0..5
+_SCORE_TABLE = (
+    ("#7f1d1d", "N/A"),
+    ("#ef4444", "Très faible"),
+    ("#f59e0b", "Faible"),
+    ("#fbbf24", "Moyen"),
+    ("#06b6d4", "Bon"),
+    ("#10b981", "Excellent"),
+)
 
-    # Stochastic (K/D) scoring: prefer low K (survente) or K > D crossover
-    try:
-        k = indicators.get("STOCH_K")
-        d = indicators.get("STOCH_D")
-        if k is None:
-            out["STOCH"] = 3
-        else:
-            ks = float(k)
-            if ks <= 20:
-                base = 5
-            elif ks <= 40:
-                base = 4
-            elif ks <= 60:
-                base = 3
-            elif ks <= 80:
-                base = 2
-            else:
-                base = 1
-            # small boost if momentum (K > D)
-            try:
-                if d is not None and float(k) > float(d):
-                    base = min(5, base + 1)
-            except Exception:
-                pass
-            out["STOCH"] = base
-    except Exception:
-        out["STOCH"] = 3
 
-    # Bollinger width scoring: narrow bands -> higher score (consolidation), wide -> low
-    try:
-        bw = indicators.get("BB_WIDTH_PCT")
-        if bw is None:
-            out["BB"] = 3
-        else:
-            bwf = float(bw)
-            if bwf < 0.03:
-                out["BB"] = 5
-            elif bwf < 0.06:
-                out["BB"] = 4
-            elif bwf < 0.09:
-                out["BB"] = 3
-            elif bwf < 0.12:
-                out["BB"] = 2
-            else:
-                out["BB"] = 1
-    except Exception:
-        out["BB"] = 3
+def _score_meta(score: int) -> tuple:
+    """Return (color, label) for a score, clamped to 0..5."""
+    i = 0 if score < 0 else 5 if score > 5 else int(score)
+    return _SCORE_TABLE[i]
 
-    # SMA crossover scoring: SMA20 relative to SMA50
-    try:
-        s20 = indicators.get("SMA20")
-        s50 = indicators.get("SMA50")
-        if s20 is None or s50 is None:
-            out["SMA"] = 3
-        else:
-            if float(s20) > float(s50):
-                out["SMA"] = 5
-            else:
-                out["SMA"] = 2
-    except Exception:
-        out["SMA"] = 3
 
-    # Candlestick pattern scoring
-    try:
-        if indicators.get("candlestick_bull_engulf") or indicators.get(
-            "candlestick_hammer"
-        ):
-            out["CANDLE"] = 5
-        elif indicators.get("candlestick_doji"):
-            out["CANDLE"] = 3
-        elif indicators.get("candlestick_bear_engulf"):
-            out["CANDLE"] = 1
-        else:
-            out["CANDLE"] = 3
-    except Exception:
-        out["CANDLE"] = 3
+def compute_overall_score(scores: dict) -> int:
+    """Return an overall score 0..5 computed from numeric entries in `scores`.
 
-    return out
+    We take the simple average of available numeric scores and round to nearest int,
+    then clamp to 0..5.
+    """
+    arr = np.fromiter(
+        (v for v in scores.values() if isinstance(v, (int, float, np.number))),
+        dtype=np.float64,
+    )
+    if arr.size == 0:
+        return 0
+    # Round to nearest integer and clamp
+    return _clamp_score(int(round(arr.mean())))
 
 
-def _score_color(score: int) -> str:
-    s = _clamp_score(score)
-    cmap = {
-        0: "#7f1d1d",
-        1: "#ef4444",
-        2: "#f59e0b",
-        3: "#fbbf24",
-        4: "#06b6d4",
-        5: "#10b981",
-    }
-    return cmap.get(s, "#64748b")
+_SCORE_CARD_TPL = string.Template(
+    """
+    <div class='score-card' style='padding:8px;border-radius:10px;margin-bottom:8px'>
+      <div style='display:flex;justify-content:space-between;align-items:center'>
+                <div style='font-size:13px;color:var(--accent);font-weight:700'>$label</div>
+        <div style='background:$color;color:#fff;padding:6px 10px;border-radius:14px;font-weight:700'>$score/5 — $text</div>
+      </div>
+    </div>
+    """
+)
 
 
-def _score_label(score: int) -> str:
-    """Return a short human-readable label for a score 0..5.
+# Price card at the top of the analysis column (filled with `str.format_map`)
+_PRICE_CARD_TPL = """
+        <div class='card'>
+          <div style='display:flex;justify-content:space-between;align-items:center'>
+            <div style='display:flex;align-items:center;gap:12px'>
+              <img src='{logo_url}' alt='{choice} logo' style='width:56px;height:56px;border-radius:10px;object-fit:cover;box-shadow:0 6px 18px rgba(2,6,23,0.12)' />
+              <div>
+                            <div style='display:flex;flex-direction:column'>
+                                <div class='header-sub' style='display:flex;gap:8px;align-items:center'><span>{symbol}</span></div>
+                                <div style='font-size:14px;font-weight:800;color:{company_color};margin-top:4px'>{choice}</div>
+                                <div style='font-size:32px;font-weight:800'>{price:.2f} €</div>
+                            </div>
+                <div style='color:#6b7280'>{change:+.2f} EUR ({pct:+.2f}%)</div>
+              </div>
+            </div>
+            <div style='text-align:right'>
+              <div class='metric-label'>RSI</div>
+              <div style='font-weight:700'>{rsi:.1f}</div>
+              <div style='height:8px'></div>
+              <div class='metric-label'>MACD</div>
+              <div style='font-weight:700'>{macd:.3f}</div>
+            </div>
+          </div>
+        </div>
+        """
+
+
+def _score_card_html(label: str, score: int) -> str:
+    """HTML of one score card, whitespace-collapsed so cards can be joined."""
+    color, text = _score_meta(score)
+    html = _SCORE_CARD_TPL.substitute(label=label, color=color, score=score, text=text)
+    return " ".join(html.split())
 
-    Keeps labels concise and in French to match the rest of the UI.
+
+def render_score_card(col, label: str, score: int):
+    col.markdown(_score_card_html(label, score), unsafe_allow_html=True)
+
+
+# Row of the "Données techniques" table (label, value)
+_TECH_CELL = "padding:6px 8px;border-bottom:1px solid rgba(0,0,0,0.04)"
+_TECH_ROW = (
+    f"<tr><td style='{_TECH_CELL};width:60%;font-weight:700;color:var(--accent)'>{{0}}</td>"
+    f"<td style='{_TECH_CELL};text-align:right'>{{1}}</td></tr>"
+).format
+# The whole table, filled with the joined rows
+_TECH_TABLE = "<div class='card'><table style='width:100%;border-collapse:collapse'>{}</table></div>".format
+
+
+def render_score_grid(cards: list, columns: int = 2):
+    """Render all `(label, score)` cards with a single `st.markdown` call.
+
+    Cards fill the grid column by column, like consecutive `render_score_card`
+    calls on `columns` Streamlit columns did.
     """
+    rows = -(-len(cards) // columns)
+    st.markdown(
+        f"<div class='score-grid' style='display:grid;grid-template-columns:repeat({columns},1fr);"
+        f"grid-template-rows:repeat({rows},auto);grid-auto-flow:column;column-gap:16px'>"
+        + "".join(_score_card_html(label, score) for label, score in cards)
+        + "</div>",
+        unsafe_allow_html=True,
+    )
+
+
+def _lttb_xy(index: pd.Index, values, n_out: int = MAX_PLOT_POINTS):
+    """`x`/`y` arrays of a trace, reduced with `lttb` when longer than `n_out`.
+
+    Missing values (e.g. the SMA warm-up) are left out of the selection.
+    Plain ndarrays are returned so Plotly doesn't convert pandas objects, and
+    float values are sent as float32 (half the payload, plenty for 2-decimal
+    display); the selection itself is done in float64.
+    """
+    xs = index.to_numpy()
+    ys = np.asarray(values)
+    y = ys.astype(np.float64, copy=False)
+    if ys.dtype.kind == "f":
+        ys = ys.astype(np.float32)
+    ok = np.flatnonzero(np.isfinite(y))
+    if ok.size <= n_out:
+        return {"x": xs, "y": ys}
+    keep = ok[lttb(ok.astype(np.float64), y[ok], n_out)]
+    return {"x": xs[keep], "y": ys[keep]}
+
+
+def _downsample_ohlcv(df_in: pd.DataFrame, max_points: int = MAX_PLOT_POINTS) -> pd.DataFrame:
+    """Aggregate OHLCV per block of bars, which preserves the price extrema
+    within each bucket while drastically reducing the candlestick count."""
+    n = len(df_in)
+    if n <= max_points:
+        return df_in
+    ratio = math.ceil(n / max_points)
+    # First row of each block; every column is reduced with one ufunc
+    # call over its ndarray instead of a pandas groupby
+    starts = np.arange(0, n, ratio)
+    lasts = np.r_[starts[1:] - 1, n - 1]
+    reducers = {
+        "Open": lambda a: a[starts],
+        "High": lambda a: np.maximum.reduceat(a, starts),
+        "Low": lambda a: np.minimum.reduceat(a, starts),
+        "Close": lambda a: a[lasts],
+        "Volume": lambda a: np.add.reduceat(a, starts),
+    }
     try:
-        s = _clamp_score(score)
+        data = {
+            c: reduce(df_in[c].to_numpy())
+            for c, reduce in reducers.items()
+            if c in df_in.columns
+        }
+        # set timestamp to the first timestamp of each block for clarity
+        return pd.DataFrame(data, index=df_in.index[starts])
     except Exception:
-        s = 0
-    labels = {
-        0: "N/A",
-        1: "Très faible",
-        2: "Faible",
-        3: "Moyen",
-        4: "Bon",
-        5: "Excellent",
-    }
-    return labels.get(s, "N/A")
+        # Fallback: if the reduction fails for any reason, return original
+        return df_in
 
 
-def compute_overall_score(scores: dict) -> int:
-    """Return an overall score 0..5 computed from numeric entries in `scores`.
+@st.cache_data(hash_funcs={pd.DataFrame: _frame_key}, max_entries=32, show_spinner=False)
+def _plot_arrays(
+    df_plot: pd.DataFrame, with_returns: bool = True, max_points: int = MAX_PLOT_POINTS
+) -> dict:
+    """`x`/`y` (or OHLC) arrays of every chart trace, keyed by trace name.
 
-    We take the simple average of available numeric scores and round to nearest int,
-    then clamp to 0..5.
+    Candlesticks are block-aggregated by `_downsample_ohlcv`, the other
+    traces reduced by `_lttb_xy`. Everything is prepared in one cached call
+    keyed on `_frame_key` (shape, columns, first/last rows), so reruns on
+    the same frame don't hash every cell nor redo the downsampling. The
+    cumulative returns are only computed when `with_returns` is set.
     """
-    vals = []
-    for v in scores.values():
-        try:
-            vals.append(float(v))
-        except Exception:
-            continue
-    if not vals:
-        return 0
-    avg = sum(vals) / len(vals)
-    # Round to nearest integer and clamp
     try:
-        iv = int(round(avg))
+        ds = _downsample_ohlcv(df_plot, max_points)
     except Exception:
-        iv = int(avg)
-    return _clamp_score(iv)
+        ds = df_plot
+    arrays = {
+        "OHLC": {
+            "x": ds.index.to_numpy(),
+            **{k.lower(): ds[k].to_numpy(dtype=np.float32) for k in ("Open", "High", "Low", "Close")},
+        }
+    }
+    for c in ("SMA20", "SMA50", "BBU", "BBL", "Volume"):
+        if c in df_plot.columns:
+            values = df_plot[c].to_numpy()
+            if c == "Volume" and values.dtype.kind == "f" and np.array_equal(values, np.trunc(values)):
+                # Whole-number float volumes go out as integers, which Plotly
+                # packs into the smallest exact int type (float32 would round
+                # volumes above 2**24 in the hover)
+                values = values.astype(np.int64)
+            arrays[c] = _lttb_xy(df_plot.index, values, max_points)
+    if with_returns:
+        close = df_plot["Close"].to_numpy(dtype=np.float64)
+        # One new array (close may be a view of the frame), finished in place
+        returns_pct = close / close[0]
+        returns_pct -= 1.0
+        returns_pct *= 100.0
+        arrays["Cumulative Return %"] = _lttb_xy(df_plot.index, returns_pct, max_points)
+    return arrays
+
+
+# Triggered-rule advice: (substrings all found in the lowercased expr, comment
+# keyword, tag), first match wins
+_RULE_PATTERNS = (
+    (("rsi <",), "oversold", "oversold"),
+    (("rsi >",), "overbought", "overbought"),
+    (("sma20", "sma50"), None, "sma_cross"),
+)
 
 
-def render_score_card(col, label: str, score: int):
-    color = _score_color(score)
-    text = _score_label(score)
-    html = f"""
-    <div class='score-card' style='padding:8px;border-radius:10px;margin-bottom:8px'>
-      <div style='display:flex;justify-content:space-between;align-items:center'>
-                <div style='font-size:13px;color:var(--accent);font-weight:700'>{label}</div>
-        <div style='background:{color};color:#fff;padding:6px 10px;border-radius:14px;font-weight:700'>{score}/5 — {text}</div>
-      </div>
-    </div>
-    """
-    col.markdown(html, unsafe_allow_html=True)
+def _rule_tag(expr_l: str, comment: str):
+    for needles, keyword, tag in _RULE_PATTERNS:
+        if all(n in expr_l for n in needles) or (keyword and keyword in comment):
+            return tag
+    return None
+
+
+def _advice_oversold(expr: str, comment: str, rsi_val) -> str:
+    # Handle RSI-related rules more precisely using thresholds
+    if rsi_val is not None and rsi_val <= RSI_OVERSOLD:
+        return f"\n- Le RSI ({rsi_val:.1f}) est en zone de survente (≤{RSI_OVERSOLD:.0f}), ce qui peut indiquer un rebond."
+    cur = f"{rsi_val:.1f}" if rsi_val is not None else "N/A"
+    return f"\n- Règle déclenchée : `{expr}` — RSI actuel = {cur} (pas strictement en survente)."
+
+
+def _advice_overbought(expr: str, comment: str, rsi_val) -> str:
+    if rsi_val is not None and rsi_val >= RSI_OVERBOUGHT:
+        return f"\n- Le RSI ({rsi_val:.1f}) est en zone de surachat (≥{RSI_OVERBOUGHT:.0f}), signalant un risque de correction."
+    if rsi_val is not None and rsi_val >= RSI_CAUTION:
+        return f"\n- Le RSI ({rsi_val:.1f}) est modérément élevé ({RSI_CAUTION:.0f}–{RSI_OVERBOUGHT:.0f}) — prudence requise."
+    cur = f"{rsi_val:.1f}" if rsi_val is not None else "N/A"
+    return f"\n- Règle déclenchée : `{expr}` — RSI actuel = {cur}."
+
+
+def _advice_sma_cross(expr: str, comment: str, rsi_val) -> str:
+    return "\n- La moyenne mobile à 20 jours est au-dessus de celle à 50 jours, confirmant une tendance haussière."
+
+
+def _advice_generic(expr: str, comment: str, rsi_val) -> str:
+    return f"\n- Signal déclenché par la règle : `{expr}` ({comment})."
+
+
+_RULE_ADVICE = {
+    "oversold": _advice_oversold,
+    "overbought": _advice_overbought,
+    "sma_cross": _advice_sma_cross,
+    None: _advice_generic,
+}
+
+
+def _parse_indicators(indicators: dict) -> dict:
+    """Float values of the indicators quoted in the advice (None when unusable)."""
+    parsed = {k: _as_float(indicators.get(k)) for k in _ADVICE_KEYS}
+    # A missing RSI has always been read as 0.0 by the advice
+    parsed["RSI"] = _as_float(indicators.get("RSI", 0.0))
+    return parsed
 
 
 def generate_advice(
-    decision: str, triggered: list, indicators: dict, fundamentals: dict | None = None
+    decision: str,
+    triggered: list,
+    indicators: dict,
+    fundamentals: dict | None = None,
+    parsed: dict | None = None,
+) -> str:
+    """Build the markdown advice text.
+
+    `parsed` is the output of `_parse_indicators(indicators)`; it is computed
+    here when the caller doesn't already have it. The text only depends on the
+    fields picked below, so it is cached on those rather than on the full
+    indicator and fundamentals dicts.
+    """
+    if parsed is None:
+        parsed = _parse_indicators(indicators)
+    rules = [{k: r[k] for k in _RULE_FIELDS if k in r} for r in triggered or ()]
+    fund = (
+        {k: fundamentals.get(k) for k in _FUNDAMENTAL_ADVICE_KEYS}
+        if fundamentals
+        else None
+    )
+    return _generate_advice_impl(decision, rules, parsed, fund)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _generate_advice_impl(
+    decision: str, triggered: list, parsed: dict, fundamentals: dict | None
 ) -> str:
-    advice_parts = []
+    rsi_val = parsed["RSI"]
+    macd, macd_s = parsed["MACD"], parsed["MACD_SIGNAL"]
+    sma20, sma50 = parsed["SMA20"], parsed["SMA50"]
+
+    buf = io.StringIO()
+
+    def add(text: str) -> None:
+        # Parts are newline-separated, as the former "\n".join(parts) did
+        if buf.tell():
+            buf.write("\n")
+        buf.write(text)
+
     if decision == "BUY":
-        advice_parts.append("📈 **Notre analyse suggère une opportunité d'achat.**")
+        add("📈 **Notre analyse suggère une opportunité d'achat.**")
     elif decision == "SELL":
-        advice_parts.append("📉 **Notre analyse suggère une opportunité de vente.**")
+        add("📉 **Notre analyse suggère une opportunité de vente.**")
     else:
         # Highlight the neutral recommendation using the company accent color
-        advice_parts.append(
+        add(
             "⚖️ <span style='color:var(--accent);font-weight:700'><strong>Il est conseillé de conserver la position pour le moment.</strong></span>"
         )
-    advice_parts.append("\n**Arguments clés :**")
+    add("\n**Arguments clés :**")
     # Evaluate triggered rules and relate them to current RSI using thresholds
     try:
-        rsi_val = None
-        try:
-            rsi_val = float(indicators.get("RSI", 0.0))
-        except Exception:
-            rsi_val = None
-
         if not triggered:
-            advice_parts.append(
+            add(
                 "\n- Aucun signal technique majeur n'a été déclenché par vos règles."
             )
         else:
             for rule in triggered:
                 comment = (rule.get("comment", "") or "").lower()
                 expr = rule.get("expr", "") or ""
-                expr_l = expr.lower()
-                # Handle RSI-related rules more precisely using thresholds
-                if "rsi <" in expr_l or "oversold" in comment:
-                    if rsi_val is not None and rsi_val <= RSI_OVERSOLD:
-                        advice_parts.append(
-                            f"\n- Le RSI ({rsi_val:.1f}) est en zone de survente (≤{RSI_OVERSOLD:.0f}), ce qui peut indiquer un rebond."
-                        )
-                    else:
-                        cur = f"{rsi_val:.1f}" if rsi_val is not None else "N/A"
-                        advice_parts.append(
-                            f"\n- Règle déclenchée : `{expr}` — RSI actuel = {cur} (pas strictement en survente)."
-                        )
-                elif "rsi >" in expr_l or "overbought" in comment:
-                    if rsi_val is not None and rsi_val >= RSI_OVERBOUGHT:
-                        advice_parts.append(
-                            f"\n- Le RSI ({rsi_val:.1f}) est en zone de surachat (≥{RSI_OVERBOUGHT:.0f}), signalant un risque de correction."
-                        )
-                    elif rsi_val is not None and rsi_val >= RSI_CAUTION:
-                        advice_parts.append(
-                            f"\n- Le RSI ({rsi_val:.1f}) est modérément élevé ({RSI_CAUTION:.0f}–{RSI_OVERBOUGHT:.0f}) — prudence requise."
-                        )
-                    else:
-                        cur = f"{rsi_val:.1f}" if rsi_val is not None else "N/A"
-                        advice_parts.append(
-                            f"\n- Règle déclenchée : `{expr}` — RSI actuel = {cur}."
-                        )
-                elif "sma20 > sma50" in expr_l or (
-                    "sma20" in expr_l and "sma50" in expr_l
-                ):
-                    advice_parts.append(
-                        "\n- La moyenne mobile à 20 jours est au-dessus de celle à 50 jours, confirmant une tendance haussière."
-                    )
-                else:
-                    advice_parts.append(
-                        f"\n- Signal déclenché par la règle : `{expr}` ({comment})."
-                    )
+                handler = _RULE_ADVICE.get(_rule_tag(expr.lower(), comment))
+                add(handler(expr, comment, rsi_val))
     except Exception:
-        advice_parts.append("\n- Erreur lors de l'analyse des règles déclenchées.")
+        add("\n- Erreur lors de l'analyse des règles déclenchées.")
     # Contre-arguments / points de vigilance (indicateurs contraires)
+    # Missing values become NaN, for which every comparison is False
+    vals = np.array(
+        [np.nan if v is None else v for v in (rsi_val, macd, macd_s, sma20, sma50)]
+    )
+    bearish = vals[[1, 3]] < vals[[2, 4]]  # MACD < signal, SMA20 < SMA50
     contra = []
-    try:
-        rsi_val = float(indicators.get("RSI", 0.0))
-        if rsi_val >= 65:
-            contra.append(
-                f"Le RSI est élevé ({rsi_val:.1f}), signe d'une zone potentielle de sur-achat à court terme."
-            )
-    except Exception:
-        pass
-    try:
-        macd = indicators.get("MACD")
-        macd_s = indicators.get("MACD_SIGNAL")
-        if macd is not None and macd_s is not None and float(macd) < float(macd_s):
-            contra.append("Le momentum (MACD) est orienté à la baisse.")
-    except Exception:
-        pass
-    try:
-        sma20 = indicators.get("SMA20")
-        sma50 = indicators.get("SMA50")
-        if sma20 is not None and sma50 is not None and float(sma20) < float(sma50):
-            contra.append(
-                "La SMA20 est en dessous de la SMA50, ce qui est un signal technique baissier."
-            )
-    except Exception:
-        pass
+    if vals[0] >= 65:
+        contra.append(
+            f"Le RSI est élevé ({rsi_val:.1f}), signe d'une zone potentielle de sur-achat à court terme."
+        )
+    if bearish[0]:
+        contra.append("Le momentum (MACD) est orienté à la baisse.")
+    if bearish[1]:
+        contra.append(
+            "La SMA20 est en dessous de la SMA50, ce qui est un signal technique baissier."
+        )
     if contra:
-        advice_parts.append("\n**Points de vigilance :**")
+        add("\n**Points de vigilance :**")
         for c in contra:
-            advice_parts.append(f"\n- {c}")
+            add(f"\n- {c}")
 
     # Volatilité (Bandes de Bollinger width)
-    try:
-        bw = indicators.get("BB_WIDTH_PCT")
-        if bw is not None:
-            if bw > 0.06:
-                advice_parts.append(
-                    "\n- La volatilité est élevée (Bandes de Bollinger larges). Attendez-vous à des mouvements de prix amples."
-                )
-            elif bw < 0.03:
-                advice_parts.append(
-                    "\n- La volatilité est faible (Bandes de Bollinger étroites) — phase de consolidation probable."
-                )
-    except Exception:
-        pass
+    bw = parsed["BB_WIDTH_PCT"]
+    if bw is not None:
+        if bw > 0.06:
+            add(
+                "\n- La volatilité est élevée (Bandes de Bollinger larges). Attendez-vous à des mouvements de prix amples."
+            )
+        elif bw < 0.03:
+            add(
+                "\n- La volatilité est faible (Bandes de Bollinger étroites) — phase de consolidation probable."
+            )
 
     # Contexte fondamental
     if fundamentals:
@@ -459,19 +663,19 @@ def generate_advice(
                     pef = float(pe)
                     if decision == "BUY" and pef > 0:
                         if pef <= 15:
-                            advice_parts.append(
+                            add(
                                 f"\n**Contexte fondamental :** Le PER est de {pef:.1f}, ce qui peut indiquer une valorisation raisonnable et renforce le signal technique."
                             )
                         elif pef >= 30:
-                            advice_parts.append(
+                            add(
                                 f"\n**Contexte fondamental :** Le PER est élevé ({pef:.1f}), ce qui invite à la prudence malgré le signal technique."
                             )
                         else:
-                            advice_parts.append(
+                            add(
                                 f"\n**Contexte fondamental :** PER = {pef:.1f}. Aucune anomalie manifeste dans la valorisation."
                             )
                     elif decision == "SELL" and pef > 0:
-                        advice_parts.append(
+                        add(
                             f"\n**Contexte fondamental :** PER = {pef:.1f}. Considérez le contexte de valorisation dans votre décision."
                         )
                 except Exception:
@@ -479,63 +683,58 @@ def generate_advice(
         except Exception:
             pass
 
-    advice_parts.append(
+    add(
         "\n\n---\n*Ces informations sont générées automatiquement à titre indicatif et ne constituent pas un conseil en investissement.*"
     )
     # Add a short ranked list of most influential triggered rules (by absolute score)
     try:
         if triggered:
-            sorted_tr = sorted(
-                triggered, key=lambda x: abs(int(x.get("score", 0))), reverse=True
+            top = heapq.nlargest(
+                5, triggered, key=lambda x: abs(int(x.get("score", 0)))
             )
-            advice_parts.append("\n**Paramètres les plus influents :**")
-            for t in sorted_tr[:5]:
+            add("\n**Paramètres les plus influents :**")
+            for t in top:
                 sc = int(t.get("score", 0))
                 expr = t.get("expr", "")
                 comment = t.get("comment", "")
                 sign = "+" if sc >= 0 else ""
-                advice_parts.append(
+                add(
                     f"\n- {sign}{sc}: `{expr}` {f'— {comment}' if comment else ''}"
                 )
         else:
             # Even if no rules triggered, show key raw indicators that may still matter
             key_params = []
-            try:
-                rsi_val = float(indicators.get("RSI", 0.0))
+            if rsi_val is not None:
                 key_params.append(f"RSI = {rsi_val:.1f}")
-            except Exception:
-                pass
-            try:
-                macd = indicators.get("MACD")
-                macd_s = indicators.get("MACD_SIGNAL")
-                if macd is not None and macd_s is not None:
-                    diff = float(macd) - float(macd_s)
-                    key_params.append(f"MACD diff = {diff:.3f}")
-            except Exception:
-                pass
-            try:
-                sma20 = indicators.get("SMA20")
-                sma50 = indicators.get("SMA50")
-                if sma20 is not None and sma50 is not None:
-                    key_params.append(
-                        f"SMA20/SMA50 = {float(sma20):.2f}/{float(sma50):.2f}"
-                    )
-            except Exception:
-                pass
+            if macd is not None and macd_s is not None:
+                key_params.append(f"MACD diff = {macd - macd_s:.3f}")
+            if sma20 is not None and sma50 is not None:
+                key_params.append(f"SMA20/SMA50 = {sma20:.2f}/{sma50:.2f}")
             if key_params:
-                advice_parts.append("\n**Paramètres clés :**")
+                add("\n**Paramètres clés :**")
                 for kp in key_params:
-                    advice_parts.append(f"\n- {kp}")
+                    add(f"\n- {kp}")
     except Exception:
         pass
 
-    return "\n".join(advice_parts)
+    return buf.getvalue()
 
 
 # --- CSS: improved hero styling and high-contrast light theme ---
-st.markdown(
-    """
-        <style>
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+
+
+def _minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace from a stylesheet."""
+    css = _CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,])\s*", r"\1", css).strip()
+
+
+@st.cache_resource
+def _app_css() -> str:
+    """Global stylesheet, minified once per process instead of on every rerun."""
+    css = """
         @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;800&display=swap');
         :root{--bg:#f8fafc; --card:#ffffff; --muted:#6b7280; --accent:#6b8cff; --accent-2:#7de1d1; --success:#0f9d58; --danger:#d9230f}
         html, body {background:var(--bg); color:#0f1724; font-family: 'Poppins', Inter, 'Segoe UI', Roboto, sans-serif}
@@ -654,19 +853,20 @@ st.markdown(
             transition: all .12s ease;
         }
 
-        </style>
-        """,
-    unsafe_allow_html=True,
-)
+        """
+    return f"<style>{_minify_css(css)}</style>"
 
-if st.session_state.get("show_landing", True):
-    # Try to load a local image from the app folder and inline it as base64 for the hero background
-    # To keep startup fast, avoid reading/encoding large local images into memory.
-    # Prefer a remote background image (fallback) rather than embedding a base64 data URL.
-    bg_url = "https://images.unsplash.com/photo-1559526324-593bc073d938?auto=format&fit=crop&w=1650&q=80"
 
-    import textwrap
+st.markdown(_app_css(), unsafe_allow_html=True)
 
+
+@st.cache_resource(max_entries=8)
+def _hero_html(bg_url: str) -> str:
+    """Landing hero markup (built once per background image).
+
+    Strings are immutable, so cache_resource hands back the cached object
+    as-is instead of unpickling a copy like cache_data does on every rerun.
+    """
     hero_html = textwrap.dedent(
         f"""
     <style>
@@ -738,6 +938,16 @@ if st.session_state.get("show_landing", True):
     hero_html = hero_html.lstrip()
     # Also strip common leading indentation on every line to avoid accidental code-block formatting
     hero_html = "\n".join([ln.lstrip() for ln in hero_html.splitlines()])
+    return hero_html
+
+
+if st.session_state.get("show_landing", True):
+    # Try to load a local image from the app folder and inline it as base64 for the hero background
+    # To keep startup fast, avoid reading/encoding large local images into memory.
+    # Prefer a remote background image (fallback) rather than embedding a base64 data URL.
+    bg_url = "https://images.unsplash.com/photo-1559526324-593bc073d938?auto=format&fit=crop&w=1650&q=80"
+
+    hero_html = _hero_html(bg_url)
 
     # Render the hero using a Streamlit component (iframe) so the HTML/CSS isn't escaped
     # and the visual full-bleed styling is preserved.
@@ -751,20 +961,7 @@ if st.session_state.get("show_landing", True):
     with cols[1]:
         if st.button("Accéder à l'analyse", key="enter_app"):
             st.session_state.show_landing = False
-            # Attempt to rerun the Streamlit script. Use st.experimental_rerun when available,
-            # otherwise raise the internal RerunException as a fallback for older/newer Streamlit builds.
-            try:
-                # Prefer raising the internal RerunException to force a rerun in many Streamlit versions.
-                from streamlit.runtime.scriptrunner.script_runner import RerunException
-
-                raise RerunException()
-            except Exception:
-                # Fallback: try the public API if available
-                try:
-                    st.experimental_rerun()
-                except Exception:
-                    # Last resort: no-op; UI will update on next interaction
-                    pass
+            _rerun()
 
     st.stop()
 
@@ -811,103 +1008,48 @@ with st.sidebar:
     try:
         if st.button("Rafraîchir les données", key="refresh_data"):
             cleared = []
-            try:
-                fetch_data.clear()
-                cleared.append("fetch_data")
-            except Exception:
-                pass
-            try:
-                compute_indicators.clear()
-                cleared.append("compute_indicators")
-            except Exception:
-                pass
-            try:
-                fetch_fundamentals.clear()
-                cleared.append("fetch_fundamentals")
-            except Exception:
-                pass
-            try:
-                get_history.clear()
-                cleared.append("get_history")
-            except Exception:
-                pass
+            for name, cached in (
+                ("fetch_data", fetch_data),
+                ("compute_indicators", compute_indicators),
+                ("fetch_fundamentals", fetch_fundamentals),
+                ("history", _history_frame),
+            ):
+                cached.clear()
+                cleared.append(name)
             st.success(f"Caches vidés: {', '.join(cleared) if cleared else 'aucun' }")
-            try:
-                # Force a rerun so the UI re-fetches fresh data
-                st.experimental_rerun()
-            except Exception:
-                pass
+            # Drop the stored analysis too, and force a rerun so the UI
+            # re-fetches fresh data
+            st.session_state.pop("_cached_analysis", None)
+            st.session_state["needs_fetch"] = True
+            _rerun()
     except Exception:
         # If button rendering fails for any Streamlit variant, ignore silently
         pass
 
-companies = [
-    ("Hermès", "RMS.PA"),
-    ("TotalEnergies", "TTE.PA"),
-    ("Airbus", "AIR.PA"),
-    ("Sopra Steria", "SOP.PA"),
-    ("Dassault Systèmes", "DSY.PA"),
-]
-
-# Per-company metadata: preferred color (hex) and optional logo URL.
-# We use a fallback avatar generator if no real logo URL is provided.
-COMPANY_META = {
-    "Hermès": {"color": "#D4AF37", "logo_url": "https://logo.clearbit.com/hermes.com"},
-    "TotalEnergies": {
-        "color": "#ff5a00",
-        "logo_url": "https://logo.clearbit.com/totalenergies.com",
-    },
-    "Airbus": {"color": "#003366", "logo_url": "https://logo.clearbit.com/airbus.com"},
-    "Sopra Steria": {
-        "color": "#e4002b",
-        "logo_url": "https://logo.clearbit.com/soprasteria.com",
-    },
-    "Dassault Systèmes": {
-        "color": "#1f77b4",
-        "logo_url": "https://logo.clearbit.com/3ds.com",
-    },
-}
+# Query-param API picked once: `st.query_params` (one string per key) on current
+# Streamlit, the experimental getter/setter (lists of strings) on older builds.
+if hasattr(st, "query_params"):
 
+    def _get_query_param(name: str):
+        return st.query_params.get(name)
 
-def _hex_lighter(hex_color: str, percent: float = 0.45) -> str:
-    """Return a lighter version of a hex color by blending with white.
+    def _set_query_param(name: str, value: str) -> None:
+        st.query_params[name] = value
 
-    percent: 0..1 where 0 returns original color, 1 returns white.
-    """
-    try:
-        h = hex_color.lstrip("#")
-        lv = len(h)
-        if lv == 3:
-            h = "".join([c * 2 for c in h])
-        r = int(h[0:2], 16)
-        g = int(h[2:4], 16)
-        b = int(h[4:6], 16)
-        r = int(r + (255 - r) * percent)
-        g = int(g + (255 - g) * percent)
-        b = int(b + (255 - b) * percent)
-        return f"#{r:02x}{g:02x}{b:02x}"
-    except Exception:
-        return hex_color
+else:
+
+    def _get_query_param(name: str):
+        values = st.experimental_get_query_params().get(name)
+        return values[0] if values else None
+
+    def _set_query_param(name: str, value: str) -> None:
+        st.experimental_set_query_params(**{name: value})
 
 
 # Determine selected company from query params or session state (we'll use a small HTML dropdown).
-try:
-    # New API: prefer stable `st.query_params` (returns a dict-like of query params)
-    params = st.query_params
-except Exception:
-    # Fallback for older Streamlit versions that still have the experimental API
-    try:
-        params = st.experimental_get_query_params()
-    except Exception:
-        params = {}
-available_names = [c[0] for c in companies]
+available_names = COMPANY_NAMES
 default_choice = available_names[0]
-candidate = None
-if "company" in params:
-    try:
-        candidate = params.get("company", [default_choice])[0]
-    except Exception:
-        candidate = default_choice
+candidate = _get_query_param("company")
 if candidate and candidate in available_names:
     choice = candidate
 else:
@@ -915,8 +1057,8 @@ else:
     choice = st.session_state.get("company_choice", default_choice)
         # Detect a change in selected company and mark that we need to fetch fresh data.
         # We intentionally avoid forcing an immediate rerun here to prevent race
-        # conditions; instead we set `needs_fetch` and clear caches just before
-        # the next actual fetch call.
+        # conditions; instead we set `needs_fetch` so the next run analyzes the
+        # new company.
 prev_choice = st.session_state.get("company_choice")
 st.session_state["company_choice"] = choice
 if prev_choice is None:
@@ -925,7 +1067,7 @@ if prev_choice is None:
 elif prev_choice != choice:
     # user switched company: request fresh fetch on next analysis run
     st.session_state["needs_fetch"] = True
-symbol = dict(companies)[choice]
+symbol = NAME_TO_SYMBOL[choice]
 
 # Use a native Streamlit selectbox for reliable, synchronous selection handling.
 try:
@@ -934,44 +1076,23 @@ try:
     # If the user changed the selection, update query params and mark for refresh.
     if new_choice != choice:
         choice = new_choice
-        try:
-            st.experimental_set_query_params(company=choice)
-        except Exception:
-            pass
+        _set_query_param("company", choice)
         # Update session state and force a fresh fetch immediately.
         st.session_state["company_choice"] = choice
         st.session_state["needs_fetch"] = True
-        # Clear last_loaded to guarantee cache-clear logic runs.
-        try:
-            st.session_state["last_loaded_company"] = None
-        except Exception:
-            pass
         # Force an immediate rerun so the app fetches and displays fresh data.
-        try:
-            try:
-                st.experimental_rerun()
-            except Exception:
-                pass
-        except Exception:
-            pass
+        _rerun()
 except Exception:
     # Fallback: use the native selectbox without query param handling
     choice = st.selectbox("Choisir une entreprise française", available_names)
     st.session_state["company_choice"] = choice
 
 # Per-selection: compute company theme (color + accent) and inject CSS vars so the whole page adapts
-meta_sel = COMPANY_META.get(choice, {})
-company_color = meta_sel.get("color", "#3A8BFF")
-company_accent2 = _hex_lighter(company_color, 0.45)
-logo_url_default = meta_sel.get("logo_url") or ""
-try:
-    # set CSS variables to override the default theme defined earlier
-    st.markdown(
-        f"<style>:root {{ --accent: {company_color}; --accent-2: {company_accent2}; }}</style>",
-        unsafe_allow_html=True,
-    )
-except Exception:
-    pass
+meta_sel = COMPANY_META.get(choice, DEFAULT_META)
+company_color = meta_sel["color"]
+company_accent2 = meta_sel["accent2"]
+# set CSS variables to override the default theme defined earlier
+st.markdown(meta_sel["theme_css"], unsafe_allow_html=True)
 
 st.markdown(
     f"<div class='sidebar-line' style='color:var(--accent);font-weight:600'>Symbole sélectionné: <b style='color:var(--accent)'>{symbol}</b></div>",
@@ -992,7 +1113,11 @@ auto_analyze = st.checkbox(
 )
 # Run analysis if auto_analyze enabled, user clicked the button,
 # or a company change requested a fresh fetch (needs_fetch).
-run_analysis = auto_analyze or st.button("Analyser") or st.session_state.get("needs_fetch", False)
+analyze_clicked = not auto_analyze and st.button("Analyser")
+if analyze_clicked:
+    # An explicit click recomputes instead of reusing the stored analysis
+    st.session_state["needs_fetch"] = True
+run_analysis = auto_analyze or analyze_clicked or st.session_state.get("needs_fetch", False)
 
 if not run_analysis:
     st.info(
@@ -1000,130 +1125,129 @@ if not run_analysis:
     )
 
 if run_analysis:
-    with st.spinner(
-        "Analyse en cours — récupération des données et calcul des indicateurs..."
-    ):
-        try:
-            # Small runtime instrumentation to help diagnose stale results.
+    # Display-only reruns (chart toggles, expanders...) reuse the last analysis
+    # instead of fetching and recomputing everything; `_as_of` moves the key
+    # forward when a new bar is due.
+    analysis_key = (symbol, period, interval, _as_of(interval))
+    cached_analysis = st.session_state.get("_cached_analysis")
+    reused = (
+        cached_analysis is not None
+        and st.session_state.get("_analysis_key") == analysis_key
+        and not st.session_state.get("needs_fetch", False)
+    )
+    if reused:
+        df, df_plot, indicators, fundamentals, result = cached_analysis
+    else:
+        with st.spinner(
+            "Analyse en cours — récupération des données et calcul des indicateurs..."
+        ):
             try:
-                last_loaded = st.session_state.get("last_loaded_company")
-                # If the currently selected choice differs from last loaded company,
-                # ensure we request a fresh fetch so cached data isn't reused.
-                if last_loaded is not None and last_loaded != choice:
-                    st.session_state["needs_fetch"] = True
-            except Exception:
-                pass
-            if not symbol:
-                st.error("Aucun symbole résolu à analyser")
-                st.stop()
+                if not symbol:
+                    st.error("Aucun symbole résolu à analyser")
+                    st.stop()
 
-            # Attempt to fetch data. For intraday minute intervals (e.g. '1m'),
-            # Yahoo/YFinance often only provides recent data (typically ~7 days).
-            # If the initial fetch returns no data, retry with a shorter period
-            # and inform the user.
-            try:
-                # If a company switch occurred previously, clear cached data now
-                # so the upcoming fetch is guaranteed to return fresh values.
-                if st.session_state.get("needs_fetch", False):
-                    try:
-                        fetch_data.clear()
-                    except Exception:
-                        pass
-                    try:
-                        compute_indicators.clear()
-                    except Exception:
-                        pass
-                    try:
-                        fetch_fundamentals.clear()
-                    except Exception:
-                        pass
-                    try:
-                        get_history.clear()
-                    except Exception:
-                        pass
-                    # reset the flag
-                    st.session_state["needs_fetch"] = False
+                # The decision engine, the advice and the history all need the
+                # fundamentals, so they cannot wait for their expander; fetch
+                # them in the background while prices and indicators load.
+                fund_future = _submit_io(fetch_fundamentals, symbol)
 
-                df = fetch_data(symbol, period=period, interval=interval)
+                # Attempt to fetch data. For intraday minute intervals (e.g. '1m'),
+                # Yahoo/YFinance often only provides recent data (typically ~7 days).
+                # If the initial fetch returns no data, retry with a shorter period
+                # and inform the user.
                 try:
-                    # Record fetch time so we can see when the last successful
-                    # retrieval occurred. Keep this guarded to avoid crashing
-                    # the UI if datetime or session_state fail for any reason.
-                    import datetime
+                    # A company switch only needs a rerun: every cache is keyed by
+                    # symbol, so switching back to a company reuses its cached data.
+                    st.session_state["needs_fetch"] = False
+
+                    df = fetch_data(symbol, period=period, interval=interval)
+                    if _DEBUG:
+                        try:
+                            # Record fetch time so we can see when the last successful
+                            # retrieval occurred. Keep this guarded to avoid crashing
+                            # the UI if datetime or session_state fail for any reason.
+                            import datetime
 
-                    st.session_state["last_fetch_time"] = datetime.datetime.utcnow().isoformat()
+                            st.session_state["last_fetch_time"] = datetime.datetime.utcnow().isoformat()
+                        except Exception:
+                            pass
+                except Exception as e_raw:
+                    # If the backend raised a descriptive error, keep it for later
+                    df = None
+                    fetch_err = e_raw
+
+                # If we received an empty DataFrame (or fetch raised), and the
+                # user requested a minute-based interval, retry with a shorter
+                # period that is compatible with intraday data. `fetch_data`
+                # returns a DataFrame or raises, so `df` is None only on error.
+                if (df is None or df.empty) and interval.endswith("m"):
+                    fallback_period = "7d"
+                    try:
+                        st.info(
+                            f"Les données intrajournalières ('{interval}') peuvent être limitées dans le temps. Réessai avec période='{fallback_period}'..."
+                        )
+                        df = fetch_data(symbol, period=fallback_period, interval=interval)
+                    except Exception as e2:
+                        # Nothing worked — present the best error message available
+                        err_msg = (
+                            str(e2) if e2 is not None else str(fetch_err)
+                        )
+                        st.error(f"Erreur récupération: {err_msg}")
+                        st.stop()
+
+                # Final check: if still empty, report and stop
+                if df is None or df.empty:
+                    st.error("Erreur récupération: Aucune donnée renvoyée pour ce symbole/intervalle.")
+                    st.stop()
+                # Record that we've loaded data for this company so subsequent
+                # UI interactions don't show stale data.
+                try:
+                    st.session_state["last_loaded_company"] = choice
                 except Exception:
                     pass
-            except Exception as e_raw:
-                # If the backend raised a descriptive error, keep it for later
-                df = None
-                fetch_err = e_raw
-
-            # If we received an empty DataFrame (or fetch raised), and the
-            # user requested a minute-based interval, retry with a shorter
-            # period that is compatible with intraday data.
-            if (df is None or (hasattr(df, 'empty') and df.empty)) and (
-                isinstance(interval, str) and interval.endswith("m")
-            ):
-                fallback_period = "7d"
-                try:
-                    st.info(
-                        f"Les données intrajournalières ('{interval}') peuvent être limitées dans le temps. Réessai avec période='{fallback_period}'..."
-                    )
-                    df = fetch_data(symbol, period=fallback_period, interval=interval)
-                except Exception as e2:
-                    # Nothing worked — present the best error message available
-                    err_msg = (
-                        str(e2) if e2 is not None else str(fetch_err)
-                    )
-                    st.error(f"Erreur récupération: {err_msg}")
-                    st.stop()
-
-            # Final check: if still empty, report and stop
-            if df is None or (hasattr(df, "empty") and df.empty):
-                st.error("Erreur récupération: Aucune donnée renvoyée pour ce symbole/intervalle.")
+            except Exception as e:
+                st.error(f"Erreur récupération: {e}")
                 st.stop()
-            # Record that we've loaded data for this company so subsequent
-            # UI interactions don't show stale data.
-            try:
-                st.session_state["last_loaded_company"] = choice
-            except Exception:
-                pass
+
+            indicators = compute_indicators(df)
+            indicators["Close"] = float(df["Close"].iloc[-1])
+
+        # Shallow copy: df_plot only gets new columns, the price columns are
+        # shared with df instead of duplicated
+        df_plot = df.copy(deep=False)
+        # One 20-bar window serves both SMA20 and the Bollinger bands
+        close = df["Close"].to_numpy(dtype=np.float64)
+        sma20, sd = rolling_mean_std(close, 20)
+        sma50, _ = rolling_mean_std(close, 50)
+        df_plot["SMA20"] = sma20
+        df_plot["SMA50"] = sma50
+        df_plot["BBU"] = sma20 + 2 * sd
+        df_plot["BBL"] = sma20 - 2 * sd
+
+        # Expose a few derived values into indicators for advice generation
+        # (last element of each series; the bands are rebuilt from the same
+        # two floats, which gives the same values as the columns)
+        sma20_last, sma50_last, sd_last = (float(x[-1]) for x in (sma20, sma50, sd))
+        latest_bbu = sma20_last + 2 * sd_last
+        latest_bbl = sma20_last - 2 * sd_last
+        indicators["SMA20"] = sma20_last
+        indicators["SMA50"] = sma50_last
+        try:
+            indicators["BB_WIDTH_PCT"] = (latest_bbu - latest_bbl) / indicators.get(
+                "Close", 1.0
+            )
+        except ZeroDivisionError:
+            indicators["BB_WIDTH_PCT"] = None
+
+        try:
+            fundamentals = fund_future.result()
         except Exception as e:
             st.error(f"Erreur récupération: {e}")
             st.stop()
-
-        indicators = compute_indicators(df)
-        indicators["Close"] = float(df["Close"].iloc[-1])
-
-    df_plot = df.copy()
-    df_plot["SMA20"] = df_plot["Close"].rolling(20).mean()
-    df_plot["SMA50"] = df_plot["Close"].rolling(50).mean()
-    ma = df_plot["Close"].rolling(20).mean()
-    sd = df_plot["Close"].rolling(20).std()
-    df_plot["BBU"] = ma + 2 * sd
-    df_plot["BBL"] = ma - 2 * sd
-
-    # Expose a few derived values into indicators for advice generation
-    try:
-        indicators["SMA20"] = float(df_plot["SMA20"].iloc[-1])
-    except Exception:
-        indicators["SMA20"] = None
-    try:
-        indicators["SMA50"] = float(df_plot["SMA50"].iloc[-1])
-    except Exception:
-        indicators["SMA50"] = None
-    try:
-        latest_bbu = float(df_plot["BBU"].iloc[-1])
-        latest_bbl = float(df_plot["BBL"].iloc[-1])
-        indicators["BB_WIDTH_PCT"] = (latest_bbu - latest_bbl) / indicators.get(
-            "Close", 1.0
-        )
-    except Exception:
-        indicators["BB_WIDTH_PCT"] = None
-
-    fundamentals = fetch_fundamentals(symbol)
-    result = engine.evaluate(indicators, fundamentals)
+        result = engine.evaluate(indicators, fundamentals)
+        st.session_state["_cached_analysis"] = (df, df_plot, indicators, fundamentals, result)
+        st.session_state["_analysis_key"] = analysis_key
+    close_arr = df["Close"].to_numpy(dtype=np.float64)
 
     col1, col_div, col2 = st.columns([1, 0.02, 2])
     try:
@@ -1136,64 +1260,36 @@ if run_analysis:
 
     with col1:
         price = indicators["Close"]
-        prev = float(df["Close"].iloc[-2]) if len(df) >= 2 else price
+        prev = float(close_arr[-2]) if len(close_arr) >= 2 else price
         change = price - prev
         pct = (change / prev * 100.0) if prev != 0 else 0.0
 
-        # Per-company theming (logo + accent colors)
-        meta = COMPANY_META.get(choice, {})
-        company_color = meta.get("color", "#3A8BFF")
-        company_accent2 = _hex_lighter(company_color, 0.45)
-        # logo: prefer provided URL, else generate an avatar image with the company name
-        logo_url = meta.get("logo_url")
-        if not logo_url:
-            try:
-                logo_name = urllib.parse.quote(choice)
-                logo_url = f"https://ui-avatars.com/api/?name={logo_name}&background={company_color.lstrip('#')}&color=ffffff&size=128"
-            except Exception:
-                logo_url = ""
-
-        # Inject CSS variables so components use the company color where we referenced --accent
-        try:
-            st.markdown(
-                f"<style>:root {{ --accent: {company_color}; --accent-2: {company_accent2}; }}</style>",
-                unsafe_allow_html=True,
-            )
-        except Exception:
-            pass
+        # Per-company theming: logo (or generated avatar) from the precomputed theme
+        logo_url = meta_sel["logo_url"]
 
-        price_html = f"""
-        <div class='card'>
-          <div style='display:flex;justify-content:space-between;align-items:center'>
-            <div style='display:flex;align-items:center;gap:12px'>
-              <img src='{logo_url}' alt='{choice} logo' style='width:56px;height:56px;border-radius:10px;object-fit:cover;box-shadow:0 6px 18px rgba(2,6,23,0.12)' />
-              <div>
-                            <div style='display:flex;flex-direction:column'>
-                                <div class='header-sub' style='display:flex;gap:8px;align-items:center'><span>{symbol}</span></div>
-                                <div style='font-size:14px;font-weight:800;color:{company_color};margin-top:4px'>{choice}</div>
-                                <div style='font-size:32px;font-weight:800'>{price:.2f} €</div>
-                            </div>
-                <div style='color:#6b7280'>{change:+.2f} EUR ({pct:+.2f}%)</div>
-              </div>
-            </div>
-            <div style='text-align:right'>
-              <div class='metric-label'>RSI</div>
-              <div style='font-weight:700'>{indicators.get('RSI',0):.1f}</div>
-              <div style='height:8px'></div>
-              <div class='metric-label'>MACD</div>
-              <div style='font-weight:700'>{indicators.get('MACD',0):.3f}</div>
-            </div>
-          </div>
-        </div>
-        """
-        st.markdown(price_html, unsafe_allow_html=True)
+        st.markdown(
+            _PRICE_CARD_TPL.format_map(
+                {
+                    "logo_url": logo_url,
+                    "choice": choice,
+                    "symbol": symbol,
+                    "company_color": company_color,
+                    "price": price,
+                    "change": change,
+                    "pct": pct,
+                    "rsi": indicators.get("RSI", 0),
+                    "macd": indicators.get("MACD", 0),
+                }
+            ),
+            unsafe_allow_html=True,
+        )
 
+        parsed = _parse_indicators(indicators)
         try:
             scores = compute_indicator_scores(indicators)
             # compute combined overall score
             overall = compute_overall_score(scores)
-            overall_color = _score_color(overall)
-            overall_label = _score_label(overall)
+            overall_color, overall_label = _score_meta(overall)
 
             st.markdown(
                 "<div class='card'><div class='header-sub'>Scores (0–5)</div>",
@@ -1211,22 +1307,25 @@ if run_analysis:
             except Exception:
                 pass
 
-            sc_l, sc_r = st.columns([1, 1])
-            render_score_card(sc_l, "RSI", scores.get("RSI", 0))
-            render_score_card(sc_l, "MACD", scores.get("MACD", 0))
-            render_score_card(sc_l, "ADX", scores.get("ADX", 0))
-            render_score_card(sc_l, "STOCH", scores.get("STOCH", 0))
-            render_score_card(sc_l, "SMA", scores.get("SMA", 0))
-            render_score_card(sc_r, "Tendance", scores.get("TREND", 0))
-            render_score_card(sc_r, "H&S", scores.get("HNS", 0))
-            render_score_card(sc_r, "BB", scores.get("BB", 0))
-            render_score_card(sc_r, "Candles", scores.get("CANDLE", 0))
+            render_score_grid(
+                [
+                    ("RSI", scores.get("RSI", 0)),
+                    ("MACD", scores.get("MACD", 0)),
+                    ("ADX", scores.get("ADX", 0)),
+                    ("STOCH", scores.get("STOCH", 0)),
+                    ("SMA", scores.get("SMA", 0)),
+                    ("Tendance", scores.get("TREND", 0)),
+                    ("H&S", scores.get("HNS", 0)),
+                    ("BB", scores.get("BB", 0)),
+                    ("Candles", scores.get("CANDLE", 0)),
+                ]
+            )
             st.markdown("</div>", unsafe_allow_html=True)
         except Exception:
             pass
 
         advice = generate_advice(
-            result["decision"], result["triggered"], indicators, fundamentals
+            result["decision"], result["triggered"], indicators, fundamentals, parsed
         )
         # Render the expander normally; widget labels are now native and colored via CSS.
         with st.expander("Conseils et détails", expanded=False):
@@ -1245,28 +1344,41 @@ if run_analysis:
         adx = indicators.get("ADX")
         di_plus = indicators.get("DI_PLUS")
         di_minus = indicators.get("DI_MINUS")
-        sigs = []
-        if adx is not None:
-            sigs.append(f"ADX: {adx:.1f}")
-        if di_plus is not None and di_minus is not None:
-            sigs.append(f"+DI: {di_plus:.1f} | -DI: {di_minus:.1f}")
-        cs = []
-        if indicators.get("candlestick_hammer"):
-            cs.append("🔔 Hammer")
-        if indicators.get("candlestick_bull_engulf"):
-            cs.append("📈 Bull Engulfing")
-        if indicators.get("candlestick_bear_engulf"):
-            cs.append("📉 Bear Engulfing")
-        if indicators.get("candlestick_doji"):
-            cs.append("⚪ Doji")
-        if cs:
-            sigs.append(" / ".join(cs))
-        st.markdown(
-            '<div style="color:var(--muted);font-size:13px">'
-            + " · ".join(sigs)
-            + "</div>",
-            unsafe_allow_html=True,
+        sig_key = (
+            adx,
+            di_plus,
+            di_minus,
+            bool(indicators.get("candlestick_hammer")),
+            bool(indicators.get("candlestick_bull_engulf")),
+            bool(indicators.get("candlestick_bear_engulf")),
+            bool(indicators.get("candlestick_doji")),
         )
+        # The element must be re-emitted on every run, but its HTML is only
+        # rebuilt when one of the signals changed.
+        if st.session_state.get("_sig_key") != sig_key:
+            sigs = []
+            if adx is not None:
+                sigs.append(f"ADX: {adx:.1f}")
+            if di_plus is not None and di_minus is not None:
+                sigs.append(f"+DI: {di_plus:.1f} | -DI: {di_minus:.1f}")
+            cs = []
+            if sig_key[3]:
+                cs.append("🔔 Hammer")
+            if sig_key[4]:
+                cs.append("📈 Bull Engulfing")
+            if sig_key[5]:
+                cs.append("📉 Bear Engulfing")
+            if sig_key[6]:
+                cs.append("⚪ Doji")
+            if cs:
+                sigs.append(" / ".join(cs))
+            st.session_state["_sig_html"] = (
+                '<div style="color:var(--muted);font-size:13px">'
+                + " · ".join(sigs)
+                + "</div>"
+            )
+            st.session_state["_sig_key"] = sig_key
+        st.markdown(st.session_state["_sig_html"], unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # --- Données techniques: rendements, volatilité, indicateurs bruts ---
@@ -1279,16 +1391,15 @@ if run_analysis:
                 unsafe_allow_html=True,
             )
             try:
-                # Cumulative returns over the loaded period
-                returns_series = (
-                    df["Close"].pct_change().fillna(0) + 1.0
-                ).cumprod() - 1.0
+                # Cumulative returns over the loaded period: the product of
+                # (1 + daily return) telescopes to last / first close.
+                n_closes = close_arr.size
+                start_price = float(close_arr[0]) if n_closes > 0 else price
                 cum_pct = (
-                    float(returns_series.iloc[-1]) * 100.0
-                    if len(returns_series) > 0
+                    (float(close_arr[-1]) / start_price - 1.0) * 100.0
+                    if n_closes > 1
                     else 0.0
                 )
-                start_price = float(df["Close"].iloc[0]) if len(df) > 0 else price
                 period_return_pct = (
                     (price / start_price - 1.0) * 100.0
                     if start_price and len(df) > 1
@@ -1296,10 +1407,11 @@ if run_analysis:
                 )
 
                 # Approximate period length in days (if index is datetime)
-                try:
-                    days = (df.index[-1] - df.index[0]).days
-                except Exception:
-                    days = None
+                days = (
+                    (df.index[-1] - df.index[0]).days
+                    if n_closes > 1 and isinstance(df.index, pd.DatetimeIndex)
+                    else None
+                )
 
                 ann_return = None
                 if days and days > 0:
@@ -1311,13 +1423,18 @@ if run_analysis:
                         ann_return = None
 
                 # Annualized volatility (estimate)
-                try:
-                    daily_ret = df["Close"].pct_change().dropna()
-                    vol_annual = float(daily_ret.std()) * (252**0.5) * 100.0
-                except Exception:
-                    vol_annual = None
+                daily_ret = close_arr[1:] / close_arr[:-1] - 1.0
+                vol_annual = (
+                    float(daily_ret.std(ddof=1)) * (252**0.5) * 100.0
+                    if daily_ret.size > 1
+                    else float("nan")
+                )
 
-                avg_vol = float(df["Volume"].mean()) if "Volume" in df.columns else None
+                avg_vol = (
+                    float(df["Volume"].to_numpy(dtype=np.float64).mean())
+                    if "Volume" in df.columns
+                    else None
+                )
 
                 rows = []
                 rows.append(("Prix actuel", f"{price:.2f} €"))
@@ -1336,40 +1453,24 @@ if run_analysis:
                     v = indicators.get(k)
                     if v is None:
                         continue
-                    if k == "BB_WIDTH_PCT":
-                        try:
-                            rows.append(("Bollinger width", f"{float(v) * 100:.2f}%"))
-                        except Exception:
-                            rows.append(("Bollinger width", str(v)))
-                    elif k in ("SMA20", "SMA50"):
-                        try:
-                            rows.append((k, f"{float(v):.2f}"))
-                        except Exception:
-                            rows.append((k, str(v)))
+                    label = "Bollinger width" if k == "BB_WIDTH_PCT" else k
+                    fv = _as_float(v)
+                    if fv is None:
+                        rows.append((label, str(v)))
+                    elif k == "BB_WIDTH_PCT":
+                        rows.append((label, f"{fv * 100:.2f}%"))
                     elif k == "MACD":
-                        try:
-                            rows.append(("MACD", f"{float(v):.3f}"))
-                        except Exception:
-                            rows.append(("MACD", str(v)))
+                        rows.append((label, f"{fv:.3f}"))
                     else:
-                        try:
-                            rows.append((k, f"{float(v):.2f}"))
-                        except Exception:
-                            rows.append((k, str(v)))
+                        rows.append((label, f"{fv:.2f}"))
 
                 # Dividend yield if present in fundamentals
-                try:
-                    dy = fundamentals.get("dividendYield")
-                    if dy is not None:
-                        rows.append(("Rendement (div)", f"{float(dy) * 100:.2f}%"))
-                except Exception:
-                    pass
+                dy = _as_float(fundamentals.get("dividendYield"))
+                if dy is not None:
+                    rows.append(("Rendement (div)", f"{dy * 100:.2f}%"))
 
                 # Render a compact two-column table inside a card
-                html = "<div class='card'><table style='width:100%;border-collapse:collapse'>"
-                for label, val in rows:
-                    html += f"<tr><td style='padding:6px 8px;border-bottom:1px solid rgba(0,0,0,0.04);width:60%;font-weight:700;color:var(--accent)'>{label}</td><td style='padding:6px 8px;border-bottom:1px solid rgba(0,0,0,0.04);text-align:right'>{val}</td></tr>"
-                html += "</table></div>"
+                html = _TECH_TABLE("".join([_TECH_ROW(label, val) for label, val in rows]))
                 st.markdown(html, unsafe_allow_html=True)
             except Exception as e:
                 st.write("Erreur calcul des données techniques :", e)
@@ -1381,348 +1482,187 @@ if run_analysis:
             )
             if fundamentals:
 
-                def humanize_number(x):
-                    try:
-                        n = float(x)
-                    except Exception:
-                        return str(x)
-                    absn = abs(n)
-                    if absn >= 1e12:
-                        return f"{n/1e12:.2f}T"
-                    if absn >= 1e9:
-                        return f"{n/1e9:.2f}B"
-                    if absn >= 1e6:
-                        return f"{n/1e6:.2f}M"
-                    if absn >= 1e3:
-                        return f"{n/1e3:.0f}k"
-                    return f"{n:g}"
-
-                def fmt_float(x, digits=2):
-                    try:
-                        return f"{float(x):.{digits}f}"
-                    except Exception:
-                        return "N/A"
-
-                mcap = humanize_number(fundamentals.get("marketCap"))
-                fpe = fmt_float(fundamentals.get("forwardPE"))
-                tpe = fmt_float(fundamentals.get("trailingPE"))
+                mcap, fpe, tpe, cells = fundamentals_view(fundamentals)
                 col_a, col_b, col_c = st.columns(3)
                 col_a.metric("Market Cap", mcap)
                 col_b.metric("Forward P/E", fpe)
                 col_c.metric("Trailing P/E", tpe)
 
-                label_map = [
-                    ("Dividende / action", "dividendRate"),
-                    ("Rendement (div)", "dividendYield"),
-                    ("EPS", "earningsPerShare"),
-                    ("PER (trailing)", "trailingPE"),
-                    ("Price / Book", "priceToBook"),
-                ]
-                rows = []
-                for label, key in label_map:
-                    val = fundamentals.get(key)
-                    if val is None:
-                        display = "N/A"
-                    else:
-                        if isinstance(val, (int, float)):
-                            if key in ("dividendYield",):
-                                try:
-                                    display = f"{float(val)*100:.2f}%"
-                                except Exception:
-                                    display = f"{val}"
-                            elif key in ("dividendRate", "earningsPerShare"):
-                                display = f"{float(val):.2f}"
-                            else:
-                                display = str(val)
-                        else:
-                            display = str(val)
-                    rows.append({"Champ": label, "Valeur": display})
+                st.dataframe(
+                    pd.DataFrame(
+                        {
+                            "Champ": FUNDAMENTAL_LABELS,
+                            "Valeur": list(cells),
+                        }
+                    ),
+                    hide_index=True,
+                )
 
     with col2:
         st.subheader(f"Graphique {symbol}")
-        df_plot = df_plot.copy()
-        try:
-            df_plot["returns_cum"] = (
-                df_plot["Close"].pct_change().fillna(0) + 1.0
-            ).cumprod() - 1.0
-        except Exception:
-            df_plot["returns_cum"] = 0.0
 
         show_sma = st.session_state.get("show_sma", True)
         show_bb = st.session_state.get("show_bb", True)
         show_volume = st.session_state.get("show_volume", True)
         show_returns = st.session_state.get("show_returns", True)
 
-        # Use three rows: price (+indicators) / volume / cumulative returns.
-        # This keeps volume and returns on separate y-scales so the returns
-        # line remains visible instead of being dwarfed by volume bars.
-        rows_heights = [0.6, 0.2, 0.2]
+        # Trace arrays (downsampled when the series is long), cached per frame
+        plot = _plot_arrays(df_plot, show_returns)
+
+        # One row per shown panel: price (+indicators) / volume / cumulative
+        # returns. This keeps volume and returns on separate y-scales so the
+        # returns line remains visible instead of being dwarfed by volume bars.
+        shown = {
+            "price": True,
+            "volume": show_volume and "Volume" in plot,
+            "returns": show_returns,
+        }
+        panel_row = {}
+        for name in PANELS:
+            if shown[name]:
+                panel_row[name] = len(panel_row) + 1
+        n_rows = len(panel_row)
         fig = make_subplots(
-            rows=3,
+            rows=n_rows,
             cols=1,
             shared_xaxes=True,
             vertical_spacing=0.04,
-            row_heights=rows_heights,
-            specs=[[{"secondary_y": False}], [{"secondary_y": False}], [{"secondary_y": False}]],
+            row_heights=[PANELS[name][0] for name in panel_row],
+            specs=[[{"secondary_y": False}]] * n_rows,
         )
 
-        fig.add_trace(
+        # Traces by name, so each one can only be added once, with their row;
+        # they are all added to the figure in one call below.
+        traces = {}
+        traces["OHLC"] = (
             go.Candlestick(
-                x=df_plot.index,
-                open=df_plot["Open"],
-                high=df_plot["High"],
-                low=df_plot["Low"],
-                close=df_plot["Close"],
+                **plot["OHLC"],
                 name="OHLC",
+                hovertemplate=HOVER["OHLC"],
                 increasing_line_color="#0f9d58",
                 decreasing_line_color="#d9230f",
             ),
-            row=1,
-            col=1,
+            1,
         )
 
         if show_sma:
             # Use the selected company color for SMA20 and a lighter accent for SMA50
-            try:
-                sma20_color = company_color
-                sma50_color = company_accent2
-            except Exception:
-                sma20_color = "#1f77b4"
-                sma50_color = "#ff7f0e"
-            fig.add_trace(
+            sma20_color = company_color or "#1f77b4"
+            sma50_color = company_accent2 or "#ff7f0e"
+            traces["SMA20"] = (
                 go.Scatter(
-                    x=df_plot.index,
-                    y=df_plot["SMA20"],
+                    **plot["SMA20"],
                     mode="lines",
                     name="SMA20",
+                    hovertemplate=HOVER["SMA20"],
                     line={"color": sma20_color},
                 ),
-                row=1,
-                col=1,
+                1,
             )
-            fig.add_trace(
+            traces["SMA50"] = (
                 go.Scatter(
-                    x=df_plot.index,
-                    y=df_plot["SMA50"],
+                    **plot["SMA50"],
                     mode="lines",
                     name="SMA50",
+                    hovertemplate=HOVER["SMA50"],
                     line={"color": sma50_color},
                 ),
-                row=1,
-                col=1,
+                1,
             )
         if show_bb:
-            fig.add_trace(
+            traces["BBU"] = (
                 go.Scatter(
-                    x=df_plot.index,
-                    y=df_plot["BBU"],
+                    **plot["BBU"],
                     mode="lines",
                     name="BBU",
+                    hovertemplate=HOVER["BBU"],
                     line={"color": "rgba(31,119,180,0.2)"},
                 ),
-                row=1,
-                col=1,
+                1,
             )
-            fig.add_trace(
+            traces["BBL"] = (
                 go.Scatter(
-                    x=df_plot.index,
-                    y=df_plot["BBL"],
+                    **plot["BBL"],
                     mode="lines",
                     name="BBL",
+                    hovertemplate=HOVER["BBL"],
                     line={"color": "rgba(31,119,180,0.2)"},
                 ),
-                row=1,
-                col=1,
+                1,
             )
 
-        if show_volume and "Volume" in df_plot.columns:
-            fig.add_trace(
+        if "volume" in panel_row:
+            traces["Volume"] = (
                 go.Bar(
-                    x=df_plot.index,
-                    y=df_plot["Volume"],
+                    **plot["Volume"],
                     name="Volume",
+                    hovertemplate=HOVER["Volume"],
                     marker_color="rgba(100,100,120,0.6)",
                 ),
-                row=2,
-                col=1,
+                panel_row["volume"],
             )
 
         # Plot cumulative returns on their own subplot so the scale is
         # independent of volume and easier to read.
-        if show_returns:
-            fig.add_trace(
+        if "returns" in panel_row:
+            traces["Cumulative Return %"] = (
                 go.Scatter(
-                    x=df_plot.index,
-                    y=df_plot["returns_cum"] * 100.0,
+                    **plot["Cumulative Return %"],
                     mode="lines",
                     name="Cumulative Return %",
+                    hovertemplate=HOVER["Cumulative Return %"],
                     line={"color": "#444444"},
                 ),
-                row=3,
-                col=1,
+                panel_row["returns"],
             )
 
-        # Downsample long series for plotting performance. We aggregate OHLCV
-        # and keep the last-known indicator values per block. This is a simple
-        # decimation strategy that preserves key price extrema within each
-        # bucket while drastically reducing point count for the renderer.
-        @st.cache_data
-        def _downsample_ohlcv(df_in: pd.DataFrame, max_points: int = 4000) -> pd.DataFrame:
-            n = len(df_in)
-            if n <= max_points:
-                return df_in
-            ratio = math.ceil(n / max_points)
-            # group index per block
-            grp = np.arange(n) // ratio
-            agg = {}
-            # OHLCV
-            if "Open" in df_in.columns:
-                agg["Open"] = "first"
-            if "High" in df_in.columns:
-                agg["High"] = "max"
-            if "Low" in df_in.columns:
-                agg["Low"] = "min"
-            if "Close" in df_in.columns:
-                agg["Close"] = "last"
-            if "Volume" in df_in.columns:
-                agg["Volume"] = "sum"
-            # indicators / moving averages: keep last value in the block
-            for c in ("SMA20", "SMA50", "BBU", "BBL", "returns_cum"):
-                if c in df_in.columns:
-                    agg[c] = "last"
-
-            try:
-                df_grp = df_in.groupby(grp).agg(agg)
-                # set timestamp to the first timestamp of each block for clarity
-                timestamps = [df_in.index[i * ratio] for i in range(len(df_grp))]
-                df_grp.index = pd.to_datetime(timestamps)
-                return df_grp
-            except Exception:
-                # Fallback: if grouping fails for any reason, return original
-                return df_in
-
-        # Apply downsampling if the series is long
-        try:
-            MAX_PLOT_POINTS = 4000
-            df_plot_ds = _downsample_ohlcv(df_plot, max_points=MAX_PLOT_POINTS)
-        except Exception:
-            df_plot_ds = df_plot
+        fig.add_traces(
+            [trace for trace, _ in traces.values()],
+            rows=[row for _, row in traces.values()],
+            cols=1,
+        )
 
-        # When we annotate H&S positions, map original indices to downsampled ones
+        # H&S markers. Positions are bars of df_plot; on downsampled candles a
+        # bar maps to the last block starting at or before it. All the lines
+        # and labels are set with one layout update.
         pos = indicators.get("hs_positions")
         if pos and isinstance(pos, (list, tuple)):
             try:
-                n_orig = len(df_plot)
-                n_ds = len(df_plot_ds)
-                if n_orig > 0 and n_ds > 0:
-                    ratio_map = math.ceil(n_orig / max(1, n_ds))
-                    pos_mapped = [int(int(idx) / ratio_map) for idx in pos]
-                else:
-                    pos_mapped = pos
+                idxs = np.asarray(pos, dtype=np.int64)
+                ds_x = plot["OHLC"]["x"]
+                if len(ds_x) != len(df_plot):
+                    bar_ts = df_plot.index.to_numpy()[idxs]
+                    idxs = np.searchsorted(ds_x, bar_ts, side="right") - 1
+                xvals = ds_x[idxs]
+                yvals = plot["OHLC"]["close"][idxs].astype(np.float64)
+                hs_line = {"color": "purple", "width": 1, "dash": "dot"}
+                fig.update_layout(
+                    shapes=[
+                        dict(type="line", xref="x", yref="paper", x0=x, x1=x, y0=0, y1=1, line=hs_line)
+                        for x in xvals
+                    ],
+                    annotations=[
+                        dict(x=x, y=y, text="H&S", showarrow=True, arrowhead=2, ax=0, ay=-30)
+                        for x, y in zip(xvals, yvals)
+                    ],
+                )
             except Exception:
-                pos_mapped = pos
-        else:
-            pos_mapped = pos
-
-        # Use downsampled DataFrame for plotting if available
-        try:
-            dp = df_plot_ds
-        except Exception:
-            dp = df_plot
-
-        pos = pos_mapped if "pos_mapped" in locals() else indicators.get("hs_positions")
-        if pos and isinstance(pos, (list, tuple)):
-            for idx in pos:
-                try:
-                    xval = dp.index[int(idx)]
-                    yval = float(dp["Close"].iloc[int(idx)])
-                    fig.add_vline(
-                        x=xval, line={"color": "purple", "width": 1, "dash": "dot"}
-                    )
-                    fig.add_annotation(
-                        x=xval,
-                        y=yval,
-                        text="H&S",
-                        showarrow=True,
-                        arrowhead=2,
-                        ax=0,
-                        ay=-30,
-                    )
-                except Exception:
-                    pass
-
-        # Remove duplicated traces (e.g., accidental double plotting of the same series)
-        try:
-            seen = set()
-            new_traces = []
-            for tr in fig.data:
-                key = (getattr(tr, "name", None), getattr(tr, "type", None))
-                if key in seen:
-                    continue
-                seen.add(key)
-                new_traces.append(tr)
-            # reassign cleaned traces
-            fig.data = tuple(new_traces)
-        except Exception:
-            pass
-
-        # Specific safeguard: if multiple 'Cumulative' traces remain (sometimes
-        # generated as slightly different scatter traces), remove any later
-        # occurrences and keep only the first one so the plot shows a single
-        # cumulative-return line.
-        try:
-            filtered = []
-            seen_cum = False
-            for tr in fig.data:
-                name = (getattr(tr, "name", "") or "").lower()
-                if "cumul" in name or "cumulative" in name or "return" in name and "cum" in name:
-                    if seen_cum:
-                        # skip this duplicate cumulative trace
-                        continue
-                    seen_cum = True
-                filtered.append(tr)
-            fig.data = tuple(filtered)
-        except Exception:
-            pass
-
-        # Final robust deduplication: compute a lightweight signature for each
-        # trace (type, name, length, SHA256 of y-values) and drop later traces
-        # with identical signatures. This handles the case where two traces are
-        # numerically identical but were created separately.
-        try:
-            sigs = set()
-            unique_traces = []
-            for tr in fig.data:
-                try:
-                    ttype = getattr(tr, "type", "")
-                    tname = (getattr(tr, "name", "") or "")
-                    y = getattr(tr, "y", None)
-                    if y is None:
-                        y_bytes = b""
-                        length = 0
-                    else:
-                        y_arr = np.asarray(y)
-                        length = y_arr.size
-                        # tobytes on a float64 representation for stable hashing
-                        try:
-                            y_bytes = y_arr.astype(np.float64).tobytes()
-                        except Exception:
-                            # Fallback to repr if conversion fails
-                            y_bytes = repr(y_arr).encode("utf-8")
-                    h = hashlib.sha256(y_bytes).hexdigest()
-                    sig = (ttype, tname, length, h)
-                except Exception:
-                    sig = (getattr(tr, "type", ""), getattr(tr, "name", ""), 0, "")
-
-                if sig in sigs:
-                    # duplicate data trace: skip
-                    continue
-                sigs.add(sig)
-                unique_traces.append(tr)
+                pass
 
-            fig.data = tuple(unique_traces)
-        except Exception:
-            pass
+        # Axes of each panel (row r uses xaxis<r>/yaxis<r>, no suffix for row 1),
+        # set in the layout update below rather than one update_*axes per row.
+        # The range slider + selector buttons attach to the bottom x-axis only.
+        axes = {}
+        for name, row in panel_row.items():
+            suffix = str(row) if row > 1 else ""
+            axes["xaxis" + suffix] = dict(rangeslider=dict(visible=False))
+            axes["yaxis" + suffix] = dict(title=dict(text=PANELS[name][1]), **AXIS_STYLE)
+        axes["xaxis" + (str(n_rows) if n_rows > 1 else "")] = dict(
+            rangeslider=dict(visible=True), rangeselector=RANGESELECTOR, **AXIS_STYLE
+        )
+        if "volume" in panel_row:
+            # Format volume axis with SI suffixes (k, M) for readability
+            axes["yaxis" + str(panel_row["volume"])]["tickformat"] = ",.0s"
 
         # Layout & interactivity improvements:
         fig.update_layout(
@@ -1732,67 +1672,9 @@ if run_analysis:
             plot_bgcolor="white",
             hovermode="x unified",
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            **axes,
         )
 
-        # Range slider + selector buttons (attach to bottom x-axis only)
-        # First, ensure no rangeslider on all xaxes
-        fig.update_xaxes(rangeslider_visible=False)
-        # Then enable rangeslider and rangeselector only on the bottom subplot (row=3)
-        fig.update_xaxes(
-            row=3,
-            col=1,
-            rangeslider_visible=True,
-            rangeselector=dict(
-                buttons=[
-                    dict(count=1, label="1d", step="day", stepmode="backward"),
-                    dict(count=7, label="7d", step="day", stepmode="backward"),
-                    dict(count=1, label="1m", step="month", stepmode="backward"),
-                    dict(count=6, label="6m", step="month", stepmode="backward"),
-                    dict(step="all", label="All"),
-                ]
-            ),
-            showgrid=True,
-            gridcolor="rgba(0,0,0,0.06)",
-            zerolinecolor="rgba(0,0,0,0.04)",
-            tickfont=dict(color="rgba(0,0,0,0.88)"),
-        )
-
-        fig.update_yaxes(
-            showgrid=True,
-            gridcolor="rgba(0,0,0,0.06)",
-            zerolinecolor="rgba(0,0,0,0.04)",
-            tickfont=dict(color="rgba(0,0,0,0.88)"),
-        )
-
-        # Axis titles and formatting per subplot — explicitly target each y-axis
-        try:
-            fig.update_yaxes(title_text="Price (EUR)", row=1, col=1)
-            # Format volume axis with SI suffixes (k, M) for readability
-            fig.update_yaxes(title_text="Volume", row=2, col=1, tickformat=",.0s")
-            fig.update_yaxes(title_text="Cumulative Return (%)", row=3, col=1)
-        except Exception:
-            pass
-
-        # Improve hover templates for clarity
-        for tr in fig.data:
-            try:
-                tname = (tr.name or "").lower()
-                if getattr(tr, "type", "") == "candlestick":
-                    tr.hovertemplate = "Date: %{x}<br>open: %{open:.2f}<br>high: %{high:.2f}<br>low: %{low:.2f}<br>close: %{close:.2f}<extra></extra>"
-                elif getattr(tr, "type", "") == "bar":
-                    tr.hovertemplate = "Date: %{x}<br>Volume: %{y:,}<extra></extra>"
-                elif "returns" in tname or "cumulative" in tname:
-                    tr.hovertemplate = "Date: %{x}<br>%{y:.2f}%<extra></extra>"
-                elif "sma" in tname or "bbu" in tname or "bbl" in tname:
-                    tr.hovertemplate = "Date: %{x}<br>" + (tr.name or "%{y}") + ": %{y:.2f}<extra></extra>"
-                else:
-                    # generic fallback for other scatter traces
-                    if getattr(tr, "type", "") == "scatter":
-                        tr.hovertemplate = "Date: %{x}<br>" + (tr.name or "%{y}") + ": %{y:.2f}<extra></extra>"
-            except Exception:
-                # Non-critical: skip if any trace doesn't accept hovertemplate
-                pass
-
         # Plotly modebar config: ensure image export button is present
         plotly_config = {
             "toImageButtonOptions": {"format": "png", "filename": f"{symbol}_chart"},
@@ -1806,15 +1688,25 @@ if run_analysis:
             # Fallback for older Streamlit versions
             st.plotly_chart(fig, use_container_width=True, config=plotly_config)
 
-    save_analysis(
-        symbol, result["decision"], result["reason"], indicators, fundamentals
-    )
+    if not reused:
+        save_analysis(
+            symbol, result["decision"], result["reason"], indicators, fundamentals
+        )
+        # The history now has a new row (it used to be refreshed on company switch)
+        _history_frame.clear()
 
     st.markdown("---")
     st.subheader("Historique des analyses")
-    hist = get_history(200)
-    if hist:
-        df_hist = pd.DataFrame(hist)
-        st.dataframe(df_hist)
+    df_hist = _history_frame(200)
+    if not df_hist.empty:
+        st.dataframe(
+            df_hist,
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "id": st.column_config.NumberColumn("id", format="%d"),
+                "ts": st.column_config.DatetimeColumn("ts", format="YYYY-MM-DD HH:mm:ss"),
+            },
+        )
     else:
         st.write("Aucune analyse enregistrée")
@@ -0,0 +1,139 @@
+"""Numeric kernel behind `compute_indicator_scores` (app/main.py).
+
+Every indicator gets a score from 1 (unfavourable) to 5 (favourable); 3 is
+used when the inputs are missing. The numeric kernel and its lookup tables
+live here, so they are compiled once per process (Numba, see `app.jit`)
+rather than re-created on every Streamlit rerun. main.py converts the
+indicator dicts into the arrays and integer codes the kernel takes.
+"""
+
+# ruff: noqa: E501
+import numpy as np
+
+from app.jit import njit
+
+# Thresholds for RSI interpretation (can be tuned)
+RSI_OVERSOLD = 30.0
+RSI_CAUTION = 60.0
+RSI_OVERBOUGHT = 70.0
+
+# Order of the values given to `score_kernel` (NaN where `have` is False)
+VALUE_KEYS = (
+    "MACD",
+    "MACD_SIGNAL",
+    "RSI",
+    "ADX",
+    "STOCH_K",
+    "STOCH_D",
+    "BB_WIDTH_PCT",
+    "SMA20",
+    "SMA50",
+    "hs_confidence",
+)
+# Order of the scores returned by `score_kernel`
+SCORE_NAMES = ("MACD", "RSI", "ADX", "TREND", "HNS", "STOCH", "BB", "SMA", "CANDLE")
+
+# Trend codes (see `trend_code`) and candlestick flags (see `candle_code`)
+TREND_UP_STRONG, TREND_UP, TREND_FLAT, TREND_DOWN_STRONG, TREND_DOWN = range(5)
+CANDLE_BULL, CANDLE_DOJI, CANDLE_BEAR = 1, 2, 4
+_TREND_SCORES = np.array([5, 4, 3, 1, 2])
+
+# Score ladders: the score of a value `x` is `SCORES[np.searchsorted(BINS, x)]`.
+# The ">=" ladders (ADX, H&S) are looked up on the negated value so that NaN
+# still lands in the last bucket, like it did with the former if/elif chains.
+_RSI_BINS = np.array([RSI_OVERSOLD, 40.0, RSI_CAUTION, RSI_OVERBOUGHT])
+_RSI_SCORES = np.array([5, 4, 3, 2, 1])
+_ADX_BINS = -np.array([25.0, 20.0, 15.0, 10.0])
+_ADX_SCORES = np.array([5, 4, 3, 2, 1])
+_STOCH_BINS = np.array([20.0, 40.0, 60.0, 80.0])
+_STOCH_SCORES = np.array([5, 4, 3, 2, 1])
+_BB_BINS = np.array([0.03, 0.06, 0.09, 0.12])
+_BB_SCORES = np.array([5, 4, 3, 2, 1])
+_HNS_BINS = -np.array([0.7, 0.4])
+_HNS_SCORES = np.array([1, 2, 3])
+
+
+def trend_code(trend: str) -> int:
+    """Map the trend label from `compute_indicators` to a TREND_* code."""
+    if "Up (strong)" in trend:
+        return TREND_UP_STRONG
+    if "Up" in trend:
+        return TREND_UP
+    if "Sideways" in trend or "Unknown" in trend:
+        return TREND_FLAT
+    if "Down" in trend and "strong" in trend:
+        return TREND_DOWN_STRONG
+    if "Down" in trend:
+        return TREND_DOWN
+    return TREND_FLAT
+
+
+def candle_code(bull: bool, doji: bool, bear: bool) -> int:
+    """Pack the candlestick flags into a CANDLE_* bitmask."""
+    return (CANDLE_BULL if bull else 0) | (CANDLE_DOJI if doji else 0) | (CANDLE_BEAR if bear else 0)
+
+
+# Explicit signature: compiled (or loaded from the on-disk cache) when this
+# module is imported rather than on the first scoring call of a session.
+@njit("int8[:](float64[:], boolean[:], boolean, int64, int64)", cache=True)
+def score_kernel(
+    vals: np.ndarray, have: np.ndarray, hs_found: bool, trend: int, candle: int
+) -> np.ndarray:
+    """Return the int8 scores (in SCORE_NAMES order) for one set of indicators.
+
+    `vals` holds the VALUE_KEYS floats and `have[i]` tells whether `vals[i]`
+    was provided (missing values score 3, except H&S which scores 5).
+    """
+    out = np.full(len(SCORE_NAMES), 3, dtype=np.int8)
+
+    # MACD
+    if have[0] and have[1]:
+        macd = vals[0]
+        diff = macd - vals[1]
+        if diff > 0 and macd > 0:
+            out[0] = 5
+        elif diff > 0:
+            out[0] = 4
+        elif abs(diff) < 1e-8:
+            out[0] = 3
+        elif diff < 0 and macd < 0:
+            out[0] = 1
+        else:
+            out[0] = 2
+
+    # RSI (higher score in the oversold zone) and ADX (stronger trend)
+    if have[2]:
+        out[1] = _RSI_SCORES[np.searchsorted(_RSI_BINS, vals[2], side="left")]
+    if have[3]:
+        out[2] = _ADX_SCORES[np.searchsorted(_ADX_BINS, -vals[3], side="left")]
+
+    out[3] = _TREND_SCORES[trend]
+
+    # Head & Shoulders: a confident pattern is bearish
+    out[4] = 5
+    if hs_found and have[9]:
+        out[4] = _HNS_SCORES[np.searchsorted(_HNS_BINS, -vals[9], side="left")]
+
+    # Stochastic: low K, with a small boost if momentum (K > D)
+    if have[4]:
+        k = vals[4]
+        s = _STOCH_SCORES[np.searchsorted(_STOCH_BINS, k, side="left")]
+        if have[5] and k > vals[5]:
+            s = min(5, s + 1)
+        out[5] = s
+
+    # Bollinger width: narrow bands (consolidation) score higher
+    if have[6]:
+        out[6] = _BB_SCORES[np.searchsorted(_BB_BINS, vals[6], side="right")]
+
+    # SMA20 relative to SMA50
+    if have[7] and have[8]:
+        out[7] = 5 if vals[7] > vals[8] else 2
+
+    if candle & CANDLE_BULL:
+        out[8] = 5
+    elif candle & CANDLE_DOJI:
+        out[8] = 3
+    elif candle & CANDLE_BEAR:
+        out[8] = 1
+    return out
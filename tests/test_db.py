@@ -0,0 +1,130 @@
+"""Tests for the analysis store (app/db.py) on a temporary database."""
+
+import math
+import os
+import queue
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app import db
+
+
+class DbTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patches = [
+            mock.patch.object(db, "DB_PATH", os.path.join(self._tmp.name, "analyses.db")),
+            mock.patch.object(db, "_conn", None),
+            mock.patch.object(db, "_readers", queue.Queue(maxsize=db.READ_POOL_SIZE)),
+            mock.patch.object(db, "_pending", []),
+        ]
+        for p in self._patches:
+            p.start()
+        db.init_db()
+
+    def tearDown(self):
+        with db._pending_lock:
+            if db._flush_timer is not None:
+                db._flush_timer.cancel()
+                db._flush_timer = None
+        while not db._readers.empty():
+            db._readers.get_nowait().close()
+        db._conn.close()
+        for p in reversed(self._patches):
+            p.stop()
+        self._tmp.cleanup()
+
+    def count_rows(self):
+        return db._get_conn().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+class QueueTest(DbTestCase):
+    def test_rows_are_written_on_flush(self):
+        db.save_analysis("AAA", "Acheter", "r", {"RSI": 25.0}, {})
+        db.save_analysis("BBB", "Vendre", "r", {"RSI": 75.0}, {})
+        self.assertEqual(self.count_rows(), 0)
+        db.flush()
+        self.assertEqual(self.count_rows(), 2)
+        self.assertEqual([h["symbol"] for h in db.get_history()], ["BBB", "AAA"])
+
+    def test_full_batch_is_written_immediately(self):
+        with mock.patch.object(db, "BATCH_SIZE", 3):
+            for i in range(3):
+                db.save_analysis(f"S{i}", "Conserver", "", {}, {})
+        self.assertEqual(self.count_rows(), 3)
+
+    def test_timer_writes_queued_rows(self):
+        with mock.patch.object(db, "FLUSH_INTERVAL", 0.05):
+            db.save_analysis("AAA", "Conserver", "", {}, {})
+            deadline = time.monotonic() + 5
+            while self.count_rows() == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_failed_flush_keeps_rows(self):
+        db.save_analysis("AAA", "Conserver", "", {}, {})
+        with mock.patch.object(db, "_insert_rows", side_effect=sqlite3.OperationalError("locked")):
+            with self.assertRaises(sqlite3.OperationalError):
+                db.flush()
+        db.save_analysis("BBB", "Conserver", "", {}, {})
+        db.flush()
+        self.assertEqual([h["symbol"] for h in db.get_history()], ["BBB", "AAA"])
+
+
+class ColumnsTest(DbTestCase):
+    def test_split_merge_round_trip(self):
+        data = {"RSI": 55.5, "MACD": 2, "SMA20": None, "ADX": float("nan"), "trend": "Up"}
+        values, rest = db._split_columns(data, db.INDICATOR_COLUMNS)
+        self.assertEqual(values, [55.5, None, None, None, None, None])
+        self.assertNotIn("RSI", rest)
+        merged = db._merge_columns(db._dumps(rest), tuple(values), db.INDICATOR_COLUMNS)
+        self.assertEqual(merged.keys(), data.keys())
+        self.assertEqual(merged["RSI"], 55.5)
+        self.assertIsInstance(merged["MACD"], int)
+        self.assertIsNone(merged["SMA20"])
+        self.assertTrue(math.isnan(merged["ADX"]))
+        self.assertNotIn("Close", merged)
+
+    def test_history_returns_stored_values(self):
+        ind = {"RSI": 30.0, "Close": 12, "SMA50": float("nan"), "MACD": None}
+        fund = {"trailingPE": 15.2, "marketCap": 123456789}
+        db.save_analyses([("AAA", "Acheter", "r", ind, fund)])
+        row = db.get_history(1)[0]
+        self.assertEqual(row["indicators"]["RSI"], 30.0)
+        self.assertEqual(row["indicators"]["Close"], 12)
+        self.assertIsInstance(row["indicators"]["Close"], int)
+        self.assertTrue(math.isnan(row["indicators"]["SMA50"]))
+        self.assertIsNone(row["indicators"]["MACD"])
+        self.assertEqual(row["fundamentals"], fund)
+        self.assertIsInstance(row["fundamentals"]["marketCap"], int)
+
+
+class JsonTest(unittest.TestCase):
+    def test_nan_reads_back_as_float(self):
+        data = {"RSI": float("nan"), "ADX": float("inf"), "n": 3, "x": None, "s": "ok"}
+        out = db._loads(db._dumps(data))
+        self.assertTrue(math.isnan(out["RSI"]))
+        self.assertEqual(out["ADX"], float("inf"))
+        self.assertEqual({k: out[k] for k in ("n", "x", "s")}, {"n": 3, "x": None, "s": "ok"})
+        self.assertIsInstance(out["n"], int)
+
+    def test_numpy_values(self):
+        data = {"a": np.float64("nan"), "b": np.array([1.0, np.nan]), "c": np.int64(7)}
+        out = db._loads(db._dumps(data))
+        self.assertTrue(math.isnan(out["a"]))
+        self.assertEqual(out["b"][0], 1.0)
+        self.assertTrue(math.isnan(out["b"][1]))
+        self.assertEqual(out["c"], 7)
+
+    def test_finite_values_unchanged(self):
+        data = {"a": 1.5, "b": [1, 2], "c": {"d": None}}
+        self.assertEqual(db._loads(db._dumps(data)), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""LTTB downsampling (app/downsample.py)."""
+
+import unittest
+
+import numpy as np
+
+from app.downsample import _edges, _lttb_kernel, _lttb_numpy, lttb
+
+
+class LttbTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(1000, dtype=np.float64)
+        self.y = np.cumsum(rng.normal(0, 1, 1000))
+
+    def test_endpoints_and_length(self):
+        for n_out in (3, 10, 250, 999):
+            idx = lttb(self.x, self.y, n_out)
+            self.assertEqual(len(idx), n_out)
+            self.assertEqual(idx[0], 0)
+            self.assertEqual(idx[-1], len(self.y) - 1)
+            self.assertTrue(np.all(np.diff(idx) > 0))
+
+    def test_short_input_is_kept(self):
+        np.testing.assert_array_equal(lttb(self.x[:50], self.y[:50], 100), np.arange(50))
+        np.testing.assert_array_equal(lttb(self.x, self.y, 2), np.arange(1000))
+
+    def test_spike_is_kept(self):
+        y = np.zeros(1000)
+        y[437] = 50.0
+        self.assertIn(437, lttb(self.x, y, 20))
+
+    def test_kernel_matches_numpy(self):
+        for n_out in (3, 17, 300):
+            edges = _edges(len(self.y), n_out)
+            np.testing.assert_array_equal(
+                _lttb_kernel(self.x, self.y, edges), _lttb_numpy(self.x, self.y, edges)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
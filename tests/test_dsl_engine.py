@@ -0,0 +1,156 @@
+"""Tests for the rule engine (app/dsl_engine.py)."""
+
+import os
+import random
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from app.dsl_engine import DSLEngine, Rule, _match_rule, _scan_rule
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "rules.dsl")
+
+
+def _normalized(parsed):
+    if parsed is None:
+        return None
+    expr, target, comment = parsed
+    return expr.strip(), target, comment.strip()
+
+
+class ScanRuleTest(unittest.TestCase):
+    LINES = (
+        "IF RSI > 70 THEN SELL # Overbought",
+        "IF RSI < 30 THEN +2 # Récompense survente",
+        "IF MACD < 0 and RSI > 65 THEN -3",
+        "if rsi > 70 then sell # lowercase",
+        "IF RSI > 70  THEN  BUY  #  spaces ",
+        "IF RSI > 70 THEN BUY #",
+        "IF RSI > 70 THEN STRONG_BUY # underscore",
+        "IF A > 1 THEN B > 2 THEN +1 # last one wins",
+        "IF RSI > 70\tTHEN\tSELL # tabs",
+        "IF RSI > 70 THEN BUY NOW # extra word",
+        "IF RSI > 70 THEN +2x",
+        "IF THEN BUY",
+        "IFRSI > 70 THEN BUY",
+        "IF RSI > 70",
+    )
+
+    def test_scanner_agrees_with_regex(self):
+        for line in self.LINES:
+            scanned = _scan_rule(line)
+            if scanned is not None:
+                self.assertEqual(_normalized(scanned), _normalized(_match_rule(line)), line)
+
+    def test_fallback_lines(self):
+        # Not in the plain shape: left to the regex
+        self.assertIsNone(_scan_rule("IF RSI > 70\tTHEN\tSELL # tabs"))
+        self.assertEqual(
+            _normalized(_match_rule("IF RSI > 70\tTHEN\tSELL # tabs")), ("RSI > 70", "SELL", "tabs")
+        )
+        self.assertEqual(_match_rule("IF RSI > 70 THEN BUY NOW")[1], "BUY")
+
+    def test_bundled_rules_use_the_scanner(self):
+        with open(RULES_PATH, encoding="utf-8") as f:
+            rules = [line.strip() for line in f if line.strip().startswith("IF")]
+        self.assertTrue(rules)
+        for line in rules:
+            self.assertIsNotNone(_scan_rule(line.replace("AND", "and")), line)
+
+    def test_load_rules(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".dsl", delete=False, encoding="utf-8") as f:
+            f.write("# comment\nIF RSI > 70 THEN SELL # hot\nIF RSI < 30\tTHEN\t+2\nnot a rule\n")
+        try:
+            engine = DSLEngine(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(
+            [(r.expr, r.score, r.action, r.comment) for r in engine.rules],
+            [("RSI > 70", -3, "SELL", "hot"), ("RSI < 30", 2, "", "")],
+        )
+
+
+class MemoTest(unittest.TestCase):
+    IND = {"RSI": 75.0, "MACD": -1.0, "MACD_SIGNAL": -0.5, "SMA20": 10.0, "SMA50": 9.0, "Close": 8.0, "BBL": 8.5}
+
+    def setUp(self):
+        self.engine = DSLEngine(RULES_PATH)
+
+    def test_repeated_context_hits_the_memo(self):
+        first = self.engine.evaluate(self.IND, {})
+        with mock.patch.object(Rule, "evaluate", autospec=True, side_effect=Rule.evaluate) as ev:
+            second = self.engine.evaluate(self.IND, {})
+            # Names no rule reads don't change the key
+            self.engine.evaluate(dict(self.IND, ADX=40.0), {"trailingPE": 12.0})
+        self.assertEqual(ev.call_count, 0)
+        self.assertEqual(first, second)
+
+    def test_changed_value_is_evaluated(self):
+        self.engine.evaluate(self.IND, {})
+        with mock.patch.object(Rule, "evaluate", autospec=True, side_effect=Rule.evaluate) as ev:
+            result = self.engine.evaluate(dict(self.IND, Close=9.0), {})
+        # Only the rule reading Close is re-evaluated
+        self.assertEqual([c.args[0].expr for c in ev.call_args_list], ["Close < BBL"])
+        self.assertEqual(result, DSLEngine(RULES_PATH).evaluate(dict(self.IND, Close=9.0), {}))
+
+    def test_memo_is_bounded(self):
+        with mock.patch("app.dsl_engine.MEMO_SIZE", 10):
+            for rsi in range(50):
+                self.engine.evaluate(dict(self.IND, RSI=float(rsi)), {})
+        self.assertLessEqual(len(self.engine._memo), 10)
+
+    def test_unhashable_values_are_not_cached(self):
+        result = self.engine.evaluate(dict(self.IND, RSI=[1]), {})
+        self.assertEqual([t["expr"] for t in result["triggered"]], ["Close < BBL"])
+        self.assertFalse(any(isinstance(v, list) for key in self.engine._memo for v in key))
+
+
+class UntrustedTest(unittest.TestCase):
+    RULES = (
+        "IF RSI > 70 THEN SELL # Overbought\n"
+        "IF RSI < 30 AND MACD > MACD_SIGNAL THEN +2\n"
+        "IF F_trailingPE > 0 AND F_trailingPE < 15 THEN +1 # cheap\n"
+        "IF Close < BBL THEN BUY\n"
+        "IF MACD > 50 OR RSI < 10 THEN -1\n"
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.NamedTemporaryFile("w", suffix=".dsl", delete=False, encoding="utf-8") as f:
+            f.write(cls.RULES)
+        try:
+            cls.trusted = DSLEngine(f.name)
+            cls.untrusted = DSLEngine(f.name, untrusted=True)
+        finally:
+            os.unlink(f.name)
+
+    def contexts(self, count):
+        rnd = random.Random(0)
+        for _ in range(count):
+            ind = {
+                k: rnd.choice((None, rnd.uniform(-3, 100)))
+                for k in ("RSI", "MACD", "MACD_SIGNAL", "Close", "BBL")
+                if rnd.random() < 0.9
+            }
+            fund = {"trailingPE": rnd.choice((None, rnd.uniform(-5, 40)))}
+            yield ind, fund
+
+    def test_matches_trusted_mode(self):
+        for ind, fund in self.contexts(500):
+            self.assertEqual(self.untrusted.evaluate(ind, fund), self.trusted.evaluate(ind, fund), (ind, fund))
+
+    def test_symtable_is_the_context(self):
+        self.untrusted.evaluate({"RSI": 80.0}, {"trailingPE": None})
+        self.assertEqual(self.untrusted.interp.symtable, {"RSI": 80.0, "F_trailingPE": 0.0})
+
+    def test_concurrent_evaluations(self):
+        cases = list(self.contexts(200))
+        expected = [self.trusted.evaluate(ind, fund) for ind, fund in cases]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            got = list(pool.map(lambda c: self.untrusted.evaluate(*c), cases * 4))
+        self.assertEqual(got, expected * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""rolling_mean_std (app/fast_bb.py) against pandas' rolling mean/std."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.fast_bb import rolling_mean_std
+
+
+class RollingMeanStdTest(unittest.TestCase):
+    def check(self, x, n):
+        mean, std = rolling_mean_std(np.asarray(x, dtype=np.float64), n)
+        s = pd.Series(x, dtype="float64")
+        np.testing.assert_allclose(mean, s.rolling(n).mean().to_numpy(), rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(std, s.rolling(n).std().to_numpy(), rtol=1e-7, atol=1e-7)
+
+    def test_random_walk(self):
+        x = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 500))
+        for n in (2, 20, 50):
+            self.check(x, n)
+
+    def test_nan_gaps(self):
+        x = 50 + np.cumsum(np.random.default_rng(1).normal(0, 1, 200))
+        x[[0, 30, 31, 100, 150]] = np.nan
+        for n in (5, 20):
+            self.check(x, n)
+
+    def test_series_shorter_than_window(self):
+        self.check([1.0, 2.0, 3.0], 20)
+        self.check([], 20)
+
+    def test_constant_series(self):
+        mean, std = rolling_mean_std(np.full(30, 7.0), 20)
+        self.assertEqual(mean[-1], 7.0)
+        self.assertAlmostEqual(std[-1], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""score_kernel (app/scoring.py) against the former if/elif scoring."""
+
+import math
+import random
+import unittest
+
+import numpy as np
+
+from app.scoring import (
+    SCORE_NAMES,
+    VALUE_KEYS,
+    candle_code,
+    score_kernel,
+    trend_code,
+)
+
+
+def _ladder(x, bounds, scores):
+    for bound, score in zip(bounds, scores):
+        if x <= bound:
+            return score
+    return scores[-1]
+
+
+def _reference_scores(ind: dict) -> dict:
+    """The scoring as written before the kernel, for float/None inputs."""
+    out = {}
+    macd, macd_s = ind.get("MACD"), ind.get("MACD_SIGNAL")
+    if macd is None or macd_s is None:
+        out["MACD"] = 3
+    else:
+        diff = macd - macd_s
+        if diff > 0 and macd > 0:
+            out["MACD"] = 5
+        elif diff > 0:
+            out["MACD"] = 4
+        elif abs(diff) < 1e-8:
+            out["MACD"] = 3
+        elif diff < 0 and macd < 0:
+            out["MACD"] = 1
+        else:
+            out["MACD"] = 2
+
+    rsi = ind.get("RSI")
+    out["RSI"] = 3 if rsi is None else _ladder(rsi, (30, 40, 60, 70), (5, 4, 3, 2, 1))
+
+    adx = ind.get("ADX")
+    if adx is None:
+        out["ADX"] = 3
+    else:
+        out["ADX"] = next((s for b, s in ((25, 5), (20, 4), (15, 3), (10, 2)) if adx >= b), 1)
+
+    trend = str(ind.get("trend", "Sideways"))
+    if "Up (strong)" in trend:
+        out["TREND"] = 5
+    elif "Up" in trend:
+        out["TREND"] = 4
+    elif "Sideways" in trend or "Unknown" in trend:
+        out["TREND"] = 3
+    elif "Down" in trend and "strong" in trend:
+        out["TREND"] = 1
+    elif "Down" in trend:
+        out["TREND"] = 2
+    else:
+        out["TREND"] = 3
+
+    if ind.get("hs_found"):
+        conf = ind.get("hs_confidence", 0.0)
+        out["HNS"] = 1 if conf >= 0.7 else 2 if conf >= 0.4 else 3
+    else:
+        out["HNS"] = 5
+
+    k, d = ind.get("STOCH_K"), ind.get("STOCH_D")
+    if k is None:
+        out["STOCH"] = 3
+    else:
+        base = _ladder(k, (20, 40, 60, 80), (5, 4, 3, 2, 1))
+        if d is not None and k > d:
+            base = min(5, base + 1)
+        out["STOCH"] = base
+
+    bw = ind.get("BB_WIDTH_PCT")
+    if bw is None:
+        out["BB"] = 3
+    else:
+        out["BB"] = next((s for b, s in ((0.03, 5), (0.06, 4), (0.09, 3), (0.12, 2)) if bw < b), 1)
+
+    s20, s50 = ind.get("SMA20"), ind.get("SMA50")
+    out["SMA"] = 3 if s20 is None or s50 is None else (5 if s20 > s50 else 2)
+
+    if ind.get("candlestick_bull_engulf") or ind.get("candlestick_hammer"):
+        out["CANDLE"] = 5
+    elif ind.get("candlestick_doji"):
+        out["CANDLE"] = 3
+    elif ind.get("candlestick_bear_engulf"):
+        out["CANDLE"] = 1
+    else:
+        out["CANDLE"] = 3
+    return out
+
+
+def _kernel_scores(ind: dict) -> dict:
+    """Run score_kernel on `ind` the way app/main.py prepares its inputs."""
+    ind = dict(ind)
+    ind.setdefault("hs_confidence", 0.0)
+    have = np.array([ind.get(k) is not None for k in VALUE_KEYS])
+    vals = np.array([ind[k] if h else math.nan for k, h in zip(VALUE_KEYS, have)], dtype=np.float64)
+    scores = score_kernel(
+        vals,
+        have,
+        bool(ind.get("hs_found")),
+        trend_code(str(ind.get("trend", "Sideways"))),
+        candle_code(
+            bool(ind.get("candlestick_bull_engulf") or ind.get("candlestick_hammer")),
+            bool(ind.get("candlestick_doji")),
+            bool(ind.get("candlestick_bear_engulf")),
+        ),
+    )
+    return dict(zip(SCORE_NAMES, (int(s) for s in scores)))
+
+
+# Threshold values of each input, so the boundaries are always exercised
+_EDGES = {
+    "RSI": (30, 40, 60, 70),
+    "ADX": (10, 15, 20, 25),
+    "STOCH_K": (20, 40, 60, 80),
+    "STOCH_D": (20, 40, 60, 80),
+    "BB_WIDTH_PCT": (0.03, 0.06, 0.09, 0.12),
+    "MACD": (-1.0, 0.0, 1e-9, 1.0),
+    "MACD_SIGNAL": (-1.0, 0.0, 1.0),
+    "SMA20": (1.0, 2.0, 3.0),
+    "SMA50": (1.0, 2.0, 3.0),
+    "hs_confidence": (0.1, 0.4, 0.7),
+}
+_TRENDS = ("Up", "Up (strong)", "Down", "Down (strong)", "Sideways", "Unknown", "weird")
+_CANDLES = ("candlestick_bull_engulf", "candlestick_hammer", "candlestick_doji", "candlestick_bear_engulf")
+
+
+class ScoreKernelTest(unittest.TestCase):
+    def test_matches_reference_scoring(self):
+        rnd = random.Random(0)
+        for _ in range(5000):
+            ind = {}
+            for key, edges in _EDGES.items():
+                r = rnd.random()
+                if r < 0.1:
+                    continue  # missing
+                if r < 0.5:
+                    ind[key] = float(rnd.choice(edges))
+                else:
+                    ind[key] = rnd.uniform(min(edges) - 10, max(edges) + 10)
+            ind["hs_found"] = rnd.random() < 0.5
+            ind["trend"] = rnd.choice(_TRENDS)
+            for key in _CANDLES:
+                ind[key] = rnd.random() < 0.2
+            self.assertEqual(_kernel_scores(ind), _reference_scores(ind), ind)
+
+    def test_missing_inputs_score_neutral(self):
+        scores = _kernel_scores({})
+        self.assertEqual(scores.pop("HNS"), 5)
+        self.assertEqual(set(scores.values()), {3})
+
+
+if __name__ == "__main__":
+    unittest.main()